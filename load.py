@@ -5,6 +5,10 @@
 
 import logging
 import os
+import time
+
+# the startup budget starts with the import of the plugin
+LOAD_START = time.perf_counter()
 
 import tkinter as tk
 from tkinter import ttk
@@ -15,7 +19,9 @@ from config import appname, config
 
 from lpads import (
     Overlay, StarportPads, StarportPadsOverlay,
-    CarrierType, FleetCarrierPads, FleetCarrierPadsOverlay
+    CarrierType, FleetCarrierPads, FleetCarrierPadsOverlay,
+    metrics, render_scheduler, tracer,
+    PadBenchmark, geometry,
 )
 
 
@@ -34,8 +40,17 @@ PREFSNAME_COL_OVERLAY = "landingpad_col_overlay"
 PREFSNAME_SCR_OVERLAY = "landingpad_scr_overlay"
 PREFSNAME_USE_OVERLAY = "landingpad_use_overlay"
 PREFSNAME_MS_DELAY = "landingpad_ms_delay"
+PREFSNAME_REF_OVERLAY = "landingpad_ref_overlay"
+PREFSNAME_METRICS = "landingpad_metrics"
+PREFSNAME_USE_SPRITES = "landingpad_use_sprites"
 OPTIONS_GREENSIDE = ["right", "left"]
 MAX_WIDTH_MINIMUM = 150
+STARTUP_BUDGET = 100        # ms for the import, plugin_start3 and plugin_app together
+METRICS_FILENAME = "landingpad.prom"
+METRICS_INTERVAL = 60000    # ms between two writes of the metrics file
+OVERLAY_TTL = 600           # s the overlay shapes stay without keepalive
+OVERLAY_TTL_REFRESHED = 30  # s the overlay shapes stay, refreshed before they expire
+MAX_REFRESH_MARGIN = 15     # s, has to stay well below OVERLAY_TTL_REFRESHED
 
 SYSTEMCOLONISATIONSHIP_STN_NAME = "$EXT_PANEL_ColonisationShip"
 COLONISATIONSHIP_TYP_NAME = "colonisationship"
@@ -56,6 +71,10 @@ class This():
     backward: bool = False
     max_width: int = 0
     use_canvas: bool = True
+    use_sprites: bool = False
+    use_metrics: bool = False
+    plugin_dir: str = None
+    startup_ms: float = 0.0
 
     # EDMC Overlay settings
     use_overlay: bool = False
@@ -65,7 +84,11 @@ class This():
     over_ms_delay: int = 100
     over_color_stn: str = "#ffffff"
     over_color_pad: str = "yellow"
-    over_ttl: int = 10*60
+    over_ttl: int = OVERLAY_TTL_REFRESHED
+    over_refresh: int = 5
+    over_refresh_budget: int = 16
+    over_screen_w: float = 1920.0
+    over_screen_h: float = 1080.0
 
     # other used globals
     curr_show: bool = None
@@ -82,10 +105,14 @@ class This():
     dummy: tk.Frame = None
     starport_canvas: StarportPads = None
     fleetcarrier_canvas: FleetCarrierPads = None
+    canvas_pending: dict[str, dict] = None
     greenside: tk.StringVar = None
     prefs_max_width: tk.IntVar = None
     prefs_hide_canvas: tk.BooleanVar = None
+    prefs_use_sprites: tk.BooleanVar = None
+    prefs_metrics: tk.BooleanVar = None
     overlay: Overlay | None = None
+    bench: PadBenchmark | None = None
     starport_overlay: StarportPadsOverlay = None
     fleetcarrier_overlay: FleetCarrierPadsOverlay = None
     prefs_radius: tk.IntVar = None
@@ -95,6 +122,8 @@ class This():
     prefs_screen_h: tk.IntVar = None
     prefs_use_over: tk.BooleanVar = None
     prefs_ms_delay: tk.IntVar = None
+    prefs_refresh: tk.IntVar = None
+    prefs_refresh_budget: tk.IntVar = None
 
     def __str__(self) -> str:
         return ("\n".join(line for line in ("",
@@ -103,6 +132,8 @@ class This():
             f"{self.backward = }",
             f"{self.max_width = }",
             f"{self.use_canvas = }",
+            f"{self.use_sprites = }",
+            f"{self.use_metrics = }",
             f"{self.use_overlay = }",
             f"{self.over_radius = }",
             f"{self.over_center_x = }",
@@ -111,6 +142,8 @@ class This():
             f"{self.over_color_stn = }",
             f"{self.over_color_pad = }",
             f"{self.over_ttl = }",
+            f"{self.over_refresh = }",
+            f"{self.over_refresh_budget = }",
             f"{self.hide_events = }",
             f"{self.starport_types = }",
             f"{self.fleetcarrier_types = }",
@@ -127,6 +160,8 @@ CMD_MESSAGE_MAP = {
 }
 CMD_MESSAGE_LEN = 6    # all commands must have the same length
 CMD_MESSAGE_STARTSWITH = tuple(CMD_MESSAGE_MAP.keys())
+CMD_TRACE = "!lptrace"   # log the latency summary
+CMD_BENCH = "!lpbench"   # cycle through all pads and log the timings
 
 # For compatibility with pre-5.0.0
 if not hasattr(config, "get_int"):
@@ -136,14 +171,48 @@ if not hasattr(config, 'get_bool'):
 if not hasattr(config, "get_str"):
     config.get_str = config.get
 
+def get_canvas(station_type, create=False):
+    # the canvases are built when they are shown the first time
+    if station_type == this.TYPE_STARPORT:
+        if this.starport_canvas is None and create:
+            this.starport_canvas = StarportPads(
+                this.starport_frame, highlightthickness=0, backward=this.backward,
+                col_stn=this.col_stn, col_pad=this.col_pad, max_with=this.max_width,
+                use_sprites=this.use_sprites,
+            )
+            this.starport_canvas.grid()
+            this.starport_canvas.config(**this.canvas_pending.pop(station_type, {}))
+        return this.starport_canvas
+    elif station_type == this.TYPE_FLEETCARRIER:
+        if this.fleetcarrier_canvas is None and create:
+            this.fleetcarrier_canvas = FleetCarrierPads(
+                this.fleetcarrier_frame, highlightthickness=0, backward=this.backward,
+                col_stn=this.col_stn, col_pad=this.col_pad, max_with=this.max_width,
+                use_sprites=this.use_sprites,
+            )
+            this.fleetcarrier_canvas.grid()
+            this.fleetcarrier_canvas.config(**this.canvas_pending.pop(station_type, {}))
+        return this.fleetcarrier_canvas
+    return None
+
+def config_canvas(station_type, **kwargs):
+    canvas = get_canvas(station_type)
+    if canvas is None:
+        this.canvas_pending.setdefault(station_type, {}).update(kwargs)
+    else:
+        canvas.config(**kwargs)
+
 def frame_resize(event):
     # reset the grid settings for the frame
     event.widget.grid(sticky=tk.EW)
-    this.starport_canvas.config(width=event.width, height=event.width)
-    this.fleetcarrier_canvas.config(width=event.width, height=event.width)
+    config_canvas(this.TYPE_STARPORT, width=event.width, height=event.width)
+    config_canvas(this.TYPE_FLEETCARRIER, width=event.width, height=event.width)
 
 def show_canvas():
     if this.use_canvas:
+        canvas = get_canvas(this.curr_station_type, create=True)
+        if canvas is not None:
+            canvas.activate()
         if this.curr_station_type == this.TYPE_STARPORT:
             this.starport_frame.grid()
         elif this.curr_station_type == this.TYPE_FLEETCARRIER:
@@ -151,25 +220,51 @@ def show_canvas():
         this.dummy.grid_remove()
 
 def hide_canvas():
+    for canvas in (this.starport_canvas, this.fleetcarrier_canvas):
+        if canvas is not None:
+            canvas.deactivate()
     this.starport_frame.grid_remove()
     this.fleetcarrier_frame.grid_remove()
     this.dummy.grid()
 
+def get_station_overlay(station_type, create=False):
+    # the overlay objects and the connection are built with the first pad
+    if station_type == this.TYPE_STARPORT:
+        if this.starport_overlay is None and create:
+            try_overlay()
+            this.starport_overlay = StarportPadsOverlay(
+                this.overlay, this.backward, this.over_radius, this.over_center_x, this.over_center_y,
+                this.over_screen_w, this.over_screen_h, this.over_ms_delay, this.over_color_stn,
+                this.over_color_pad, this.over_ttl, None, this.starport_canvas,
+            )
+        return this.starport_overlay
+    elif station_type == this.TYPE_FLEETCARRIER:
+        if this.fleetcarrier_overlay is None and create:
+            try_overlay()
+            this.fleetcarrier_overlay = FleetCarrierPadsOverlay(
+                this.overlay, this.backward, this.over_radius, this.over_center_x, this.over_center_y,
+                this.over_screen_w, this.over_screen_h, this.over_ms_delay, this.over_color_stn,
+                this.over_color_pad, this.over_ttl, None, this.fleetcarrier_canvas,
+            )
+        return this.fleetcarrier_overlay
+    return None
+
+def station_overlays():
+    return [obj for obj in (this.starport_overlay, this.fleetcarrier_overlay) if obj is not None]
+
 def show_overlay():
     if this.overlay is None and this.use_overlay:
         try_overlay()
-        this.starport_overlay.config(overlay=this.overlay)
-        this.fleetcarrier_overlay.config(overlay=this.overlay)
-    if this.curr_station_type == this.TYPE_STARPORT:
-        this.starport_overlay.show_overlay()
-    elif this.curr_station_type == this.TYPE_FLEETCARRIER:
-        this.fleetcarrier_overlay.show_overlay()
+        for station_overlay in station_overlays():
+            station_overlay.config(overlay=this.overlay, screen_w=this.over_screen_w, screen_h=this.over_screen_h)
+    station_overlay = get_station_overlay(this.curr_station_type)
+    if station_overlay is not None:
+        station_overlay.show_overlay()
 
 def hide_overlay():
-    if this.curr_station_type == this.TYPE_STARPORT:
-        this.starport_overlay.hide_overlay()
-    elif this.curr_station_type == this.TYPE_FLEETCARRIER:
-        this.fleetcarrier_overlay.hide_overlay()
+    station_overlay = get_station_overlay(this.curr_station_type)
+    if station_overlay is not None:
+        station_overlay.hide_overlay()
 
 def show_station(show):
     if this.curr_show != show:
@@ -200,6 +295,13 @@ def get_overlay_prefs(parent):
         this.over_color_stn = vals[0]
         this.over_color_pad = vals[1]
 
+    split_me = config.get_str(PREFSNAME_REF_OVERLAY)
+    if split_me:
+        vals = split_me.split(":")
+        this.over_refresh = int(vals[0])
+        this.over_refresh_budget = int(vals[1])
+    this.over_ttl = overlay_ttl(this.over_refresh)
+
     split_me = config.get_str(PREFSNAME_SCR_OVERLAY)
     if split_me:
         vals = split_me.split("x")
@@ -208,19 +310,9 @@ def get_overlay_prefs(parent):
     else:
         sw = float(parent.winfo_screenwidth())
         sh = float(parent.winfo_screenheight())
-
-    try_overlay()
-
-    this.starport_overlay = StarportPadsOverlay(
-        this.overlay, this.backward, this.over_radius, this.over_center_x, this.over_center_y,
-        sw, sh, this.over_ms_delay, this.over_color_stn, this.over_color_pad, this.over_ttl,
-        None, this.starport_canvas,
-    )
-    this.fleetcarrier_overlay = FleetCarrierPadsOverlay(
-        this.overlay, this.backward, this.over_radius, this.over_center_x, this.over_center_y,
-        sw, sh, this.over_ms_delay, this.over_color_stn, this.over_color_pad, this.over_ttl,
-        None, this.fleetcarrier_canvas,
-    )
+    # the overlay gets connected with the first pad
+    this.over_screen_w = sw
+    this.over_screen_h = sh
 
     this.prefs_radius = tk.IntVar(value=this.over_radius)
     this.prefs_center_x = tk.IntVar(value=this.over_center_x)
@@ -229,23 +321,87 @@ def get_overlay_prefs(parent):
     this.prefs_screen_h = tk.IntVar(value=int(sh))
     this.prefs_use_over = tk.BooleanVar(value=this.use_overlay)
     this.prefs_ms_delay = tk.IntVar(value=this.over_ms_delay)
+    this.prefs_refresh = tk.IntVar(value=this.over_refresh)
+    this.prefs_refresh_budget = tk.IntVar(value=this.over_refresh_budget)
+
+def overlay_ttl(refresh):
+    # without the keepalive the shapes have to last on their own
+    return OVERLAY_TTL_REFRESHED if refresh else OVERLAY_TTL
 
 def try_overlay():
     # test for EDMC Overlay
     if this.use_overlay and this.overlay is None:
         try:
-            this.overlay = Overlay(logger)
+            this.overlay = Overlay(
+                logger, refresh_margin=this.over_refresh, refresh_budget=this.over_refresh_budget,
+            )
             this.overlay.connect()
-        except:
+        except Exception as err:
+            # a missing server is reported by the sender thread
+            logger.warning("EDMC Overlay not available", exc_info=err)
             this.overlay = None
-        if not this.overlay:
-            logger.warning("EDMC Overlay not available")
+
+def bench_steps():
+    # the same path as the pad commands
+    for command, (station_type, carrier_type) in CMD_MESSAGE_MAP.items():
+        if station_type == this.TYPE_STARPORT:
+            pad_count = geometry.STARPORT_PAD_COUNT
+        else:
+            pad_count = len(geometry.carrier_pad_list(carrier_type))
+        for pad in range(1, pad_count+1):
+            entry = {"event": "SendText", "To": "local", "Message": f"{command}{pad}"}
+            yield entry["Message"], lambda entry=entry: journal_entry(None, False, None, None, entry, {})
+
+def bench_done(result):
+    this.bench = None
+    show_station(False)
+    this.curr_station_type = None
+
+def start_bench():
+    if this.bench is not None:
+        logger.info("pad benchmark is already running")
+        return
+    logger.info("pad benchmark started")
+    this.bench = PadBenchmark(this.dummy, bench_steps(), logger, lambda: this.overlay, bench_done)
+    this.bench.start()
+
+def write_metrics():
+    if this.use_metrics and this.plugin_dir:
+        filename = os.path.join(this.plugin_dir, METRICS_FILENAME)
+        try:
+            metrics.write(filename)
+        except OSError as err:
+            logger.warning(f"Can't write {filename}", exc_info=err)
+
+def metrics_timer():
+    write_metrics()
+    this.dummy.after(METRICS_INTERVAL, metrics_timer)
 
 def plugin_start3(plugin_dir):
+    # EDMC calls this right after the import
     logger.info(f"{__version__ = }")
+    this.plugin_dir = plugin_dir
+    metrics.gauge(
+        "overlay_queue_depth", "Messages waiting for the overlay sender",
+        lambda: this.overlay.pending if this.overlay else 0,
+    )
+    metrics.gauge(
+        "overlay_connected", "Overlay link is up",
+        lambda: bool(this.overlay and this.overlay.transport.connected),
+    )
+    metrics.gauge("station_shown", "Station is shown", lambda: bool(this.curr_show))
+    this.startup_ms = (time.perf_counter() - LOAD_START) * 1000
     return PLUGIN_NAME
 
+def plugin_stop():
+    logger.debug(f"canvas redraws: {render_scheduler.stats()}")
+    if this.overlay is not None:
+        hide_overlay()
+        this.overlay.stop()
+    write_metrics()
+
 def plugin_app(parent):
+    start = time.perf_counter()
     # adapt to theme
     theme = config.get_int('theme')
     this.col_stn = config.get_str('dark_highlight') if theme else "black"
@@ -266,23 +422,21 @@ def plugin_app(parent):
     this.fleetcarrier_frame = tk.Frame(frame)      # fleetcarrier frame
     this.dummy = tk.Frame(frame)                   # dummy frame for resize/hide
 
-    # station canvas
+    # station canvas, built on first use
     this.use_canvas = not config.get_bool(PREFSNAME_HIDE_CANVAS, default=False)
     this.prefs_hide_canvas = tk.BooleanVar(value=not this.use_canvas)
-    this.starport_canvas = StarportPads(
-        this.starport_frame, highlightthickness=0, backward=this.backward,
-        col_stn=this.col_stn, col_pad=this.col_pad, max_with=this.max_width,
-    )
-    this.starport_canvas.grid()
-    this.fleetcarrier_canvas = FleetCarrierPads(
-        this.fleetcarrier_frame, highlightthickness=0, backward=this.backward,
-        col_stn=this.col_stn, col_pad=this.col_pad, max_with=this.max_width,
-    )
-    this.fleetcarrier_canvas.grid()
+    this.use_sprites = config.get_bool(PREFSNAME_USE_SPRITES, default=False)
+    this.prefs_use_sprites = tk.BooleanVar(value=this.use_sprites)
+    this.canvas_pending = {}
 
     # keep the station size in sync
     frame.bind("<Configure>", frame_resize)
 
+    # runtime metrics as Prometheus text file
+    this.use_metrics = config.get_bool(PREFSNAME_METRICS, default=False)
+    this.prefs_metrics = tk.BooleanVar(value=this.use_metrics)
+    this.dummy.after(METRICS_INTERVAL, metrics_timer)
+
     get_overlay_prefs(parent)
 
     # don't show the station
@@ -290,6 +444,13 @@ def plugin_app(parent):
 
     logger.debug(f"{this = !s}")
 
+    this.startup_ms += (time.perf_counter() - start) * 1000
+    tracer.record("startup", this.startup_ms)
+    if this.startup_ms > STARTUP_BUDGET:
+        logger.warning(f"startup took {this.startup_ms:.1f} ms, budget is {STARTUP_BUDGET} ms")
+    else:
+        logger.debug(f"startup took {this.startup_ms:.1f} ms")
+
     return frame
 
 def plugin_prefs(parent, cmdr, is_beta):
@@ -313,10 +474,12 @@ def plugin_prefs(parent, cmdr, is_beta):
     nb.EntryMenu(frame, textvariable=this.prefs_max_width).grid(row=11, column=1, columnspan=2, padx=PADX, pady=PADY, sticky=tk.W)
 
     nb.Checkbutton(frame, text='Hide station canvas', variable=this.prefs_hide_canvas).grid(row=12, column=1, columnspan=2, padx=PADX, pady=PADY, sticky=tk.W)
+    nb.Checkbutton(frame, text='Draw station as image (needs Pillow)', variable=this.prefs_use_sprites).grid(row=13, column=1, columnspan=2, padx=PADX, pady=PADY, sticky=tk.W)
+    nb.Checkbutton(frame, text=f'Write metrics to {METRICS_FILENAME}', variable=this.prefs_metrics).grid(row=14, column=1, columnspan=2, padx=PADX, pady=PADY, sticky=tk.W)
 
     nb.Label(frame).grid(sticky=tk.W)
-    nb.Label(frame, text='Overlay').grid(row=15, padx=2*PADX, pady=(PADX, 0), sticky=tk.W)
-    nb.Checkbutton(frame, text='Use overlay if available', variable=this.prefs_use_over).grid(row=15, column=2, padx=PADX, sticky=tk.W)
+    nb.Label(frame, text='Overlay').grid(row=16, padx=2*PADX, pady=(PADX, 0), sticky=tk.W)
+    nb.Checkbutton(frame, text='Use overlay if available', variable=this.prefs_use_over).grid(row=16, column=2, padx=PADX, sticky=tk.W)
     ttk.Separator(frame, orient=tk.HORIZONTAL).grid(columnspan=3, padx=PADX, pady=PADY, sticky=tk.EW)
 
     nb.Label(frame, text='Station').grid(row=20, padx=2*PADX, sticky=tk.W)
@@ -339,6 +502,12 @@ def plugin_prefs(parent, cmdr, is_beta):
     nb.Label(frame, text='msec').grid(row=31, column=1, padx=PADX, sticky=tk.E)
     nb.EntryMenu(frame, textvariable=this.prefs_ms_delay).grid(row=31, column=2, padx=PADX, pady=PADY, sticky=tk.EW)
 
+    nb.Label(frame, text='Keepalive').grid(row=32, padx=2*PADX, sticky=tk.W)
+    nb.Label(frame, text='sec').grid(row=32, column=1, padx=PADX, sticky=tk.E)
+    nb.EntryMenu(frame, textvariable=this.prefs_refresh).grid(row=32, column=2, padx=PADX, pady=PADY, sticky=tk.EW)
+    nb.Label(frame, text='Shapes').grid(row=33, column=1, padx=PADX, sticky=tk.E)
+    nb.EntryMenu(frame, textvariable=this.prefs_refresh_budget).grid(row=33, column=2, padx=PADX, pady=PADY, sticky=tk.EW)
+
     return frame
 
 def prefs_changed(cmdr, is_beta):
@@ -360,13 +529,19 @@ def prefs_changed(cmdr, is_beta):
         else:
             this.max_width = max(this.max_width, MAX_WIDTH_MINIMUM)
         this.prefs_max_width.set(this.max_width)
-    this.starport_canvas.config(max_width=this.max_width)
-    this.fleetcarrier_canvas.config(max_width=this.max_width)
+    config_canvas(this.TYPE_STARPORT, max_width=this.max_width)
+    config_canvas(this.TYPE_FLEETCARRIER, max_width=this.max_width)
     config.set(PREFSNAME_MAX_WIDTH, this.max_width)
 
     this.use_canvas = not this.prefs_hide_canvas.get()
     config.set(PREFSNAME_HIDE_CANVAS, not this.use_canvas)
 
+    this.use_sprites = this.prefs_use_sprites.get()
+    config.set(PREFSNAME_USE_SPRITES, this.use_sprites)
+
+    this.use_metrics = this.prefs_metrics.get()
+    config.set(PREFSNAME_METRICS, this.use_metrics)
+
     this.use_overlay = this.prefs_use_over.get()
     config.set(PREFSNAME_USE_OVERLAY, this.use_overlay)
 
@@ -384,24 +559,36 @@ def prefs_changed(cmdr, is_beta):
     this.over_ms_delay = this.prefs_ms_delay.get()
     config.set(PREFSNAME_MS_DELAY, str(this.over_ms_delay))
 
+    this.over_refresh = min(max(this.prefs_refresh.get(), 0), MAX_REFRESH_MARGIN)
+    this.over_refresh_budget = max(this.prefs_refresh_budget.get(), 1)
+    this.prefs_refresh.set(this.over_refresh)
+    this.prefs_refresh_budget.set(this.over_refresh_budget)
+    this.over_ttl = overlay_ttl(this.over_refresh)
+    ref_prefs = "%d:%d" % (this.over_refresh, this.over_refresh_budget)
+    config.set(PREFSNAME_REF_OVERLAY, ref_prefs)
+
     # update station
     width = this.dummy.master.winfo_width()
-    this.starport_canvas.config(col_stn=this.col_stn, col_pad=this.col_pad, backward=this.backward, width=width)
-    this.fleetcarrier_canvas.config(col_stn=this.col_stn, col_pad=this.col_pad, backward=this.backward, width=width)
+    config_canvas(this.TYPE_STARPORT, col_stn=this.col_stn, col_pad=this.col_pad, backward=this.backward, use_sprites=this.use_sprites, width=width)
+    config_canvas(this.TYPE_FLEETCARRIER, col_stn=this.col_stn, col_pad=this.col_pad, backward=this.backward, use_sprites=this.use_sprites, width=width)
+    this.over_screen_w = float(sw)
+    this.over_screen_h = float(sh)
     if not this.use_overlay:
+        for station_overlay in station_overlays():
+            station_overlay.hide_overlay()
+        if this.overlay is not None:
+            this.overlay.stop(wait=False)
         this.overlay = None
-        this.starport_overlay.hide_overlay()
-        this.fleetcarrier_overlay.hide_overlay()
-    this.starport_overlay.config(
-        overlay=this.overlay, backward=this.backward, radius=this.over_radius,
-        center_x=this.over_center_x, center_y=this.over_center_y,
-        screen_w=float(sw), screen_h=float(sh), ms_delay=this.over_ms_delay,
-    )
-    this.fleetcarrier_overlay.config(
-        overlay=this.overlay, backward=this.backward, radius=this.over_radius,
-        center_x=this.over_center_x, center_y=this.over_center_y,
-        screen_w=float(sw), screen_h=float(sh), ms_delay=this.over_ms_delay,
-    )
+    if this.overlay is not None:
+        this.overlay.refresh_margin = this.over_refresh
+        this.overlay.refresh_budget = this.over_refresh_budget
+    for station_overlay in station_overlays():
+        station_overlay.config(
+            overlay=this.overlay, backward=this.backward, radius=this.over_radius,
+            center_x=this.over_center_x, center_y=this.over_center_y,
+            screen_w=this.over_screen_w, screen_h=this.over_screen_h, ms_delay=this.over_ms_delay,
+            ttl=this.over_ttl,
+        )
 
 # ED Bug: these ships are reported as 'SurfaceStation'
 # you can identify them by name or market id, afaik
@@ -413,16 +600,19 @@ def check_for_colonisationship(typ: str, market_id: int, stn_name: str) -> bool:
         )
     return False
 
+@tracer.timed("journal_entry")
 def journal_entry(cmdr, is_beta, system, station, entry, state):
     if entry['event'] == 'DockingGranted':
+        tracer.begin(entry.get('timestamp'))
         typ = entry.get('StationType', 'Unknown').lower()
         if check_for_colonisationship(typ, entry["MarketID"], entry["StationName"]):
             typ = COLONISATIONSHIP_TYP_NAME
+        metrics.count_dock(typ)
         pad = int(entry['LandingPad'])
         if typ in this.starport_types:
             this.curr_station_type = this.TYPE_STARPORT
-            this.starport_canvas.config(cur_pad=pad)
-            this.starport_overlay.config(cur_pad=pad)
+            config_canvas(this.TYPE_STARPORT, cur_pad=pad)
+            get_station_overlay(this.TYPE_STARPORT, create=True).config(cur_pad=pad)
             show_station(True)
         elif typ in this.fleetcarrier_types:
             this.curr_station_type = this.TYPE_FLEETCARRIER
@@ -432,8 +622,8 @@ def journal_entry(cmdr, is_beta, system, station, entry, state):
                 carrier_type = CarrierType.SquadronCarrier
             else:
                 carrier_type = CarrierType.FleetCarrier
-            this.fleetcarrier_canvas.config(cur_pad=pad, carrier_type=carrier_type)
-            this.fleetcarrier_overlay.config(cur_pad=pad, carrier_type=carrier_type)
+            config_canvas(this.TYPE_FLEETCARRIER, cur_pad=pad, carrier_type=carrier_type)
+            get_station_overlay(this.TYPE_FLEETCARRIER, create=True).config(cur_pad=pad, carrier_type=carrier_type)
             show_station(True)
         else:
             this.curr_station_type = None
@@ -441,11 +631,18 @@ def journal_entry(cmdr, is_beta, system, station, entry, state):
     elif entry['event'] in this.hide_events:
         show_station(False)
         this.curr_station_type = None
+        if entry['event'] == 'Shutdown' and this.overlay is not None:
+            # let the sender thread drain the deletes and exit
+            this.overlay.stop(wait=False)
     elif entry['event'] == 'Music':
         if entry['MusicTrack'] == "MainMenu":
             # only way I know, if the user logged out
             show_station(False)
             this.curr_station_type = None
+    elif entry["event"] == "SendText" and entry["Message"] == CMD_TRACE:
+        tracer.log_summary(logger)
+    elif entry["event"] == "SendText" and entry["Message"] == CMD_BENCH:
+        start_bench()
     elif entry["event"] == "SendText" and entry["Message"].startswith(CMD_MESSAGE_STARTSWITH):
         station_type, carrier_type = CMD_MESSAGE_MAP.get(entry["Message"][:CMD_MESSAGE_LEN])
         if this.curr_station_type != station_type:
@@ -456,12 +653,13 @@ def journal_entry(cmdr, is_beta, system, station, entry, state):
         except ValueError:
             pad = None
         if pad:
+            tracer.begin(entry.get("timestamp"))
             if this.curr_station_type == this.TYPE_STARPORT:
-                this.starport_canvas.config(cur_pad=pad)
-                this.starport_overlay.config(cur_pad=pad)
+                config_canvas(this.TYPE_STARPORT, cur_pad=pad)
+                get_station_overlay(this.TYPE_STARPORT, create=True).config(cur_pad=pad)
             else:
-                this.fleetcarrier_canvas.config(cur_pad=pad, carrier_type=carrier_type)
-                this.fleetcarrier_overlay.config(cur_pad=pad, carrier_type=carrier_type)
+                config_canvas(this.TYPE_FLEETCARRIER, cur_pad=pad, carrier_type=carrier_type)
+                get_station_overlay(this.TYPE_FLEETCARRIER, create=True).config(cur_pad=pad, carrier_type=carrier_type)
             show_station(True)
         else:
             show_station(False)
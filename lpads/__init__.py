@@ -1,3 +1,7 @@
 from .starport import StarportPads, StarportPadsOverlay
 from .fleetcarrier import CarrierType, FleetCarrierPads, FleetCarrierPadsOverlay
-from .overlay import Overlay
+from .metrics import Metrics, metrics
+from .overlay import Overlay, OverlayHealth
+from .scheduler import RenderScheduler, render_scheduler
+from .selfbench import PadBenchmark
+from .trace import Tracer, tracer
@@ -1,10 +1,28 @@
 import tkinter as tk
 
+from . import sprites
+from .display import flat
+from .metrics import metrics
+from .scheduler import render_scheduler
+from .trace import tracer
+
+# Tk options which depend only on the kind of a primitive
+TK_KIND_OPTIONS = {
+    "polygon": {"joinstyle": tk.ROUND},
+    "polyline": {"capstyle": tk.BUTT, "joinstyle": tk.ROUND},
+    "line": {"capstyle": tk.ROUND},
+    "rect": {},
+    "oval": {},
+}
+
 class LandingPads(tk.Canvas):
 
+    # config changes applied to the existing items
+    style_attrs = {"col_stn", "col_pad", "backward"}
+
     def __init__(
         self, parent, cur_pad=None, backward=False,
-        col_stn="black", col_pad="blue", max_with=0, **kwargs
+        col_stn="black", col_pad="blue", max_with=0, use_sprites=False, **kwargs
     ):
         tk.Canvas.__init__(self, parent, **kwargs)
         self.bind("<Configure>", self.on_resize)
@@ -18,32 +36,220 @@ class LandingPads(tk.Canvas):
         self.col_stn = col_stn
         self.pad_obj = None
         self.stn_obj = False
+        self.stn_img = None
+        # draw the station as cached image, needs Pillow
+        self.use_sprites = use_sprites
+        self.dirty_station = True
+        self.dirty_size = False
+        self.dirty_pad = True
+        self.active = False
         self.backward = backward
         self.calc_values()
 
     def config(self, **kwargs):
-        self.col_stn = kwargs.pop("col_stn", self.col_stn)
-        self.col_pad = kwargs.pop("col_pad", self.col_pad)
-        self.cur_pad = kwargs.pop("cur_pad", self.cur_pad)
-        self.backward = kwargs.pop("backward", self.backward)
-        self.max_width = kwargs.pop("max_width", self.max_width)
+        changed = set()
+        for attr_name in ("col_stn", "col_pad", "cur_pad", "backward", "max_width", "use_sprites"):
+            if attr_name in kwargs:
+                value = kwargs.pop(attr_name)
+                if value != getattr(self, attr_name):
+                    setattr(self, attr_name, value)
+                    changed.add(attr_name)
         if self.max_width and "width" in kwargs:
             kwargs["width"] = min(kwargs["width"], self.max_width)
             kwargs["height"] = kwargs["width"]
-        tk.Canvas.config(self, **kwargs)
-        self.draw_station()
-        self.draw_pad(self.cur_pad)
+        if kwargs:
+            # a new size is drawn by on_resize
+            tk.Canvas.config(self, **kwargs)
+        if self.dirty_station or not self.stn_obj or "use_sprites" in changed:
+            self.request_redraw(station=True)
+        else:
+            if changed & self.style_attrs:
+                self.restyle(changed)
+            if changed & {"cur_pad", "backward"}:
+                self.request_redraw()
 
     def on_resize(self, event):
         # resize the canvas
         self.width = self.height = event.width
-        self.config(width=self.width, height=self.height)
+        if event.height != event.width or (self.max_width and event.width > self.max_width):
+            self.config(width=self.width, height=self.height)
+        self.request_redraw(resize=True)
+
+    def request_redraw(self, station=False, resize=False):
+        """mark the canvas dirty, the render scheduler draws it when Tk is idle"""
+        self.dirty_station |= station
+        self.dirty_size |= resize
+        self.dirty_pad = True
+        if self.active:
+            render_scheduler.request(self)
+
+    def activate(self):
+        """the canvas gets visible, draw what was deferred"""
+        self.active = True
+        if self.dirty_station or self.dirty_pad or not self.stn_obj:
+            render_scheduler.request(self)
+
+    def deactivate(self):
+        """the canvas is hidden, only record changes from now on"""
+        self.active = False
+        render_scheduler.cancel(self)
+
+    def render(self):
+        """draw the pending changes, called by the render scheduler"""
+        if self.dirty_station or not self.stn_obj:
+            self.draw_station()
+            metrics.canvas_full += 1
+        elif self.dirty_size:
+            if not self.transform_station():
+                self.draw_station()
+            metrics.canvas_resize += 1
+        elif self.dirty_pad:
+            metrics.canvas_pad += 1
+        if self.dirty_pad:
+            self.draw_pad(self.cur_pad)
+
+    def rgba(self, color):
+        r, g, b = self.winfo_rgb(color)
+        return (r >> 8, g >> 8, b >> 8, 255)
+
+    @tracer.timed("canvas.draw_station")
+    def draw_station(self):
+        # redraw
+        self.delete("all")
+        self.pad_obj = None
+        self.stn_obj = False
+        self.calc_layout()
+        if self.use_sprites and sprites.available():
+            self.stn_img = sprites.sprite_cache.get(self.sprite_key(), self.render_sprite, master=self)
+            self.create_image(0, 0, anchor=tk.NW, image=self.stn_img, tags="station")
+        else:
+            self.stn_img = None
+            for prim in self.station_list():
+                self.draw_primitive(prim)
+        self.stn_obj = True
+        self.dirty_station = False
+        self.dirty_size = False
+        self.dirty_pad = True
+
+    @staticmethod
+    def tk_options(prim):
+        """style of a primitive as Tk item options"""
+        if prim.kind in ("line", "polyline"):
+            options = {"fill": prim.color}
+        else:
+            options = {"fill": prim.fill or ""}
+            if prim.color:
+                options["outline"] = prim.color
+        options["width"] = prim.width
+        return options
+
+    def draw_primitive(self, prim):
+        """
+        create the canvas item of a primitive, tagged with its layer, tag and key
+        :param prim: Primitive
+        :return: item id
+        """
+        create = {
+            "polygon": self.create_polygon,
+            "polyline": self.create_line,
+            "line": self.create_line,
+            "rect": self.create_rectangle,
+            "oval": self.create_oval,
+        }[prim.kind]
+        return create(
+            *flat(prim.coords), tags=tuple(dict.fromkeys((prim.layer, prim.tag, prim.key))),
+            **self.tk_options(prim), **TK_KIND_OPTIONS[prim.kind],
+        )
+
+    def render_sprite(self):
+        image, draw = sprites.new_image(self.width, self.height)
+        sprites.draw_primitives(draw, self.station_list(), self.rgba)
+        return image
+
+    def transform_station(self):
+        """
+        fit the drawn station to the new size with one affine transform,
+        only possible while the line widths stay the same
+        :return: False if the station has to be drawn again
+        """
+        if self.stn_img is not None:
+            return False
+        cx, cy, length, strong = self.get_anchor()
+        self.calc_layout()
+        new_cx, new_cy, new_length, new_strong = self.get_anchor()
+        if new_strong != strong or not length:
+            return False
+        factor = new_length / length
+        self.scale("all", cx, cy, factor, factor)
+        self.move("all", new_cx - cx, new_cy - cy)
+        self.dirty_size = False
+        self.dirty_pad = True
+        return True
+
+    def restyle(self, changed):
+        """
+        apply colour and greenside changes to the tagged items,
+        nothing is deleted and the station geometry is kept
+        :param changed: set of the changed config attributes
+        """
+        if self.stn_img is not None:
+            self.stn_img = sprites.sprite_cache.get(self.sprite_key(), self.render_sprite, master=self)
+            self.itemconfigure("station", image=self.stn_img)
+        else:
+            self.restyle_station_items(changed)
+        if changed & {"col_stn", "col_pad"} and self.pad_obj and self.cur_pad:
+            self.itemconfigure(self.pad_obj, **self.tk_options(self.pad_primitive(self.cur_pad)))
+
+    def restyle_station_items(self, changed):
+        primitives = self.station_list()
+        if "col_stn" in changed:
+            # one call per style group, the line widths are kept
+            styled = set()
+            for prim in primitives:
+                if prim.tag not in styled:
+                    styled.add(prim.tag)
+                    options = self.tk_options(prim)
+                    del options["width"]
+                    self.itemconfigure(prim.tag, **options)
+        if "backward" in changed:
+            for prim in primitives:
+                self.coords(prim.key, *flat(prim.coords))
 
     def calc_values(self):
         raise NotImplementedError
 
-    def draw_station(self):
+    def calc_layout(self):
         raise NotImplementedError
 
+    def get_anchor(self):
+        """:return: center x, center y, scale length, line strength of the layout"""
+        raise NotImplementedError
+
+    def station_list(self):
+        """:return: display list of the station in the current layout"""
+        raise NotImplementedError
+
+    def sprite_key(self):
+        raise NotImplementedError
+
+    @tracer.timed("canvas.draw_pad")
     def draw_pad(self, pad):
+        if not self.stn_obj:
+            self.draw_station()
+        self.cur_pad = pad
+        self.dirty_pad = False
+        if not pad:
+            if self.pad_obj:
+                self.itemconfigure(self.pad_obj, state=tk.HIDDEN)
+            return
+        prim = self.pad_primitive(pad)
+        if self.pad_obj:
+            # just move the existing pad
+            self.coords(self.pad_obj, *flat(prim.coords))
+            self.itemconfigure(self.pad_obj, state=tk.NORMAL)
+        else:
+            self.pad_obj = self.draw_primitive(prim)
+        tracer.finish("pad.canvas")
+
+    def pad_primitive(self, pad):
         raise NotImplementedError
@@ -0,0 +1,185 @@
+"""
+    Renderer independent display lists of the stations
+
+    A display list is a tuple of Primitive records, built once per scene
+    and drawn by the Tk canvas, the sprite image, the overlay or into a file.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from . import geometry
+from .geometry import CACHE_SIZE
+
+# kind      polygon (closed), polyline, line (one segment), rect, oval
+# layer     station, toaster, pad
+# tag       style group: shell, sector, toaster-green, toaster-red, pad
+# key       unique in the display list
+# coords    ((x, y), ...), rect and oval by two corners
+# color     line colour, None for the default of the backend
+# fill      fill colour or None
+# width     line width
+Primitive = namedtuple(
+    "Primitive", ("kind", "layer", "tag", "key", "coords", "color", "fill", "width"),
+    defaults=(None, None, 1),
+)
+
+
+def flat(coords):
+    return [v for point in coords for v in point]
+
+
+# Canvas
+
+@lru_cache(maxsize=CACHE_SIZE)
+def starport_station(cx, cy, radius, strong, col_stn, backward):
+    shells = geometry.starport_shells(cx, cy, radius)
+    last = len(shells) - 1
+    primitives = [
+        Primitive(
+            "polygon", "station", "shell", f"shell-{p}", points,
+            color=col_stn, width=strong if p in (0, last) else max(1, strong-1),
+        )
+        for p, points in enumerate(shells)
+    ]
+    primitives.extend(
+        Primitive("line", "station", "sector", f"sector-{s}", line, color=col_stn, width=strong)
+        for s, line in enumerate(zip(shells[0], shells[-1]))
+    )
+    # right side first, the green side is on the right unless backward
+    toaster = geometry.toaster(radius)
+    for side, tag in ((1, "toaster-red" if backward else "toaster-green"), (-1, "toaster-green" if backward else "toaster-red")):
+        primitives.append(Primitive(
+            "polyline", "toaster", tag, tag,
+            tuple((cx+side*dx, cy+dy) for (dx, dy) in toaster),
+            color="green" if tag == "toaster-green" else "red", width=2*strong,
+        ))
+    return tuple(primitives)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def starport_pad(pad, cx, cy, radius, backward, col_pad):
+    x1, y1, x2, y2 = geometry.canvas_pad_oval(pad, cx, cy, radius, backward)
+    return Primitive("oval", "pad", "pad", "pad", ((x1, y1), (x2, y2)), fill=col_pad)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def carrier_station(carrier_type, unit_length, cx, cy, strong, col_stn):
+    return tuple(
+        Primitive("rect", "station", "shell", f"box-{b}", ((x1, y1), (x2, y2)), color=col_stn, width=strong)
+        for b, (x1, y1, x2, y2) in enumerate(geometry.carrier_pad_boxes(carrier_type, unit_length, cx, cy))
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def carrier_pad(pad, carrier_type, unit_length, cx, cy, strong, col_stn, col_pad):
+    boxes = geometry.carrier_pad_boxes(carrier_type, unit_length, cx, cy)
+    x1, y1, x2, y2 = boxes[(pad-1) % len(boxes)]
+    return Primitive("rect", "pad", "pad", "pad", ((x1, y1), (x2, y2)), color=col_stn, fill=col_pad, width=strong)
+
+
+# Overlay
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_starport_station(cx, cy, radius, aspect_x, color, compact):
+    if compact:
+        path = geometry.overlay_station_path(cx, cy, radius, aspect_x)
+        return (Primitive("polyline", "station", "shell", "station", path, color=color),)
+    shells, lines = geometry.overlay_station(cx, cy, radius, aspect_x)
+    return tuple(
+        Primitive("polyline", "station", "shell", f"shell-{p}", shell, color=color)
+        for p, shell in enumerate(shells)
+    ) + tuple(
+        Primitive("line", "station", "sector", f"line-{l}", line, color=color)
+        for l, line in enumerate(lines)
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_starport_toaster(cx, cy, radius, aspect_x, backward, compact):
+    color_right = "red" if backward else "green"
+    color_left = "green" if backward else "red"
+    if compact:
+        # both line offsets in one polyline
+        toasters = (geometry.overlay_toaster_paths(cx, cy, radius, aspect_x),)
+    else:
+        toasters = geometry.overlay_toaster(cx, cy, radius, aspect_x)
+    primitives = []
+    for ds, (right, left) in enumerate(toasters):
+        primitives.append(Primitive(
+            "polyline", "toaster", f"toaster-{color_right}", f"toaster-right-{ds}", right, color=color_right,
+        ))
+        primitives.append(Primitive(
+            "polyline", "toaster", f"toaster-{color_left}", f"toaster-left-{ds}", left, color=color_left,
+        ))
+    return tuple(primitives)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_starport_pad(pad, cx, cy, radius, backward, aspect_x, color):
+    return tuple(
+        Primitive("rect", "pad", "pad", f"pad-{pad}-{i}", ((x, y), (x+w, y+h)), color=color, fill=color)
+        for i, (x, y, w, h) in enumerate(geometry.overlay_pad_rects(pad, cx, cy, radius, backward, aspect_x))
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_carrier_station(carrier_type, unit_length, cx, cy, aspect_x, color):
+    return tuple(
+        Primitive("rect", "station", "shell", f"station-{i}", ((x, y), (x+w, y+h)), color=color)
+        for i, (x, y, w, h) in enumerate(
+            geometry.overlay_carrier_rects(carrier_type, unit_length, cx, cy, aspect_x)
+        )
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_carrier_pad(pad, carrier_type, unit_length, cx, cy, aspect_x, color):
+    rects = geometry.overlay_carrier_rects(carrier_type, unit_length, cx, cy, aspect_x)
+    x, y, w, h = rects[(pad - 1) % len(rects)]
+    return (Primitive("rect", "pad", "pad", f"pad-{pad}", ((x, y), (x+w, y+h)), color=color, fill=color),)
+
+
+# File
+
+def svg(primitives, width, height, background=None):
+    """
+    :param primitives: display list
+    :param width: image width
+    :param height: image height
+    :param background: fill colour, None for transparent
+    :return: SVG document as string
+    """
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
+    if background:
+        lines.append(f'<rect width="{width}" height="{height}" fill="{background}"/>')
+    for prim in primitives:
+        style = (
+            f'stroke="{prim.color or "black"}" stroke-width="{prim.width}" '
+            f'fill="{prim.fill or "none"}" class="{prim.layer} {prim.tag}"'
+        )
+        if prim.kind in ("rect", "oval"):
+            (x1, y1), (x2, y2) = prim.coords
+            x, y, w, h = min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1)
+            if prim.kind == "rect":
+                lines.append(f'<rect id="{prim.key}" x="{x}" y="{y}" width="{w}" height="{h}" {style}/>')
+            else:
+                lines.append(
+                    f'<ellipse id="{prim.key}" cx="{x + w/2}" cy="{y + h/2}" rx="{w/2}" ry="{h/2}" {style}/>'
+                )
+        else:
+            element = "polygon" if prim.kind == "polygon" else "polyline"
+            points = " ".join(f"{x},{y}" for (x, y) in prim.coords)
+            lines.append(
+                f'<{element} id="{prim.key}" points="{points}" {style} '
+                f'stroke-linejoin="round" stroke-linecap="{"butt" if prim.kind == "polyline" else "round"}"/>'
+            )
+    lines.append("</svg>")
+    return "\n".join(lines)
+
+
+CACHED_FUNCTIONS = (
+    starport_station, starport_pad, carrier_station, carrier_pad,
+    overlay_starport_station, overlay_starport_toaster, overlay_starport_pad,
+    overlay_carrier_station, overlay_carrier_pad,
+)
@@ -0,0 +1,330 @@
+"""
+    Memoised station geometry, shared by the canvas and overlay renderers
+"""
+
+import math
+from enum import Enum
+from functools import lru_cache
+
+from .misc import round_away
+
+# maximum number of cached layouts per function, enough for a dozen
+# canvas sizes or overlay placements of all carrier types both ways
+CACHE_SIZE = 128
+
+FLEETCARRIER_BOX_WIDTH = 48
+FLEETCARRIER_BOX_HEIGHT = 76
+SQUADRON_CARRIER_OFFSET = FLEETCARRIER_BOX_WIDTH / 2 + 2
+
+
+class CarrierType(Enum):
+    FleetCarrier = 1
+    SquadronCarrier = 2
+    ColonisationShip = 3
+
+
+SIN15 = math.sin(math.radians(15))
+COS15 = math.cos(math.radians(15))
+SIN45 = math.sqrt(2) / 2
+SIN60 = math.sqrt(3) / 2
+
+DODECAGON = (
+    (+COS15, -SIN15),
+    (+SIN45, -SIN45),
+    (+SIN15, -COS15),
+    (-SIN15, -COS15),
+    (-SIN45, -SIN45),
+    (-COS15, -SIN15),
+    (-COS15, +SIN15),
+    (-SIN45, +SIN45),
+    (-SIN15, +COS15),
+    (+SIN15, +COS15),
+    (+SIN45, +SIN45),
+    (+COS15, +SIN15),
+)
+PAD_SECTORS = (
+    ( 0, +1), (-0.5, +SIN60), (-SIN60, +0.5),
+    (-1,  0), (-SIN60, -0.5), (-0.5, -SIN60),
+    ( 0, -1), (+0.5, -SIN60), (+SIN60, -0.5),
+    (+1,  0), (+SIN60, +0.5), (+0.5, +SIN60),
+)
+SHELL_SCALE = (1, 0.625, 0.455, 0.25)
+STARPORT_PAD_LIST = (
+    (0,0), (0,0), (0,2), (0,2),
+    (1,0), (1,0), (1,1), (1,2),
+    (2,0), (2,2),
+    (3,0), (3,0), (3,1), (3,2), (3,2),
+)
+STARPORT_PAD_COUNT = 45
+
+# overlay pad marker, three rectangles approximating a dot
+OVERLAY_DOT = ((3, 9), (7, 7), (9, 3))
+
+
+def cache_info():
+    """cache statistics of all memoised functions"""
+    return {func.__name__: func.cache_info() for func in CACHED_FUNCTIONS}
+
+
+def cache_clear():
+    for func in CACHED_FUNCTIONS:
+        func.cache_clear()
+
+
+def aspect(aspect_x, x):
+    return round_away(aspect_x * x)
+
+
+# Starport
+
+@lru_cache(maxsize=CACHE_SIZE)
+def poly_points(cx, cy, r):
+    return tuple(
+        (
+            cx + round_away(dx*r),
+            cy + round_away(dy*r),
+        )
+        for (dx, dy) in DODECAGON
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def starport_shells(cx, cy, radius):
+    """vertices of all shells"""
+    return tuple(poly_points(cx, cy, radius * scale) for scale in SHELL_SCALE)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def toaster(r, s=0):
+    dx = round_away(r * 0.75)
+    dy = round_away(r * SHELL_SCALE[-1])
+    dr = round_away(dy * 0.08)
+    return (
+        (+0,     -dy-s),
+        (+dx-dr, -dy-s),
+        (+dx+dr, -dy+2*dr-s),
+        (+r-dr,  -dy+2*dr-s),
+        (+r-s,   -dy+3*dr-s),
+        (+r-s,   +dy-3*dr+s),
+        (+r-dr,  +dy-2*dr+s),
+        (+dx+dr, +dy-2*dr+s),
+        (+dx-dr, +dy+s),
+        (+0,     +dy+s),
+    )
+
+
+def starport_pad_coords(pad):
+    """sector and ring of a zero based pad number"""
+    pad %= STARPORT_PAD_COUNT
+    s, t = STARPORT_PAD_LIST[pad % 15]
+    s += int(pad / 15) * 4
+    return (s, t)
+
+
+STARPORT_PAD_TABLE = tuple(starport_pad_coords(pad) for pad in range(STARPORT_PAD_COUNT))
+
+
+def pad_center(s, t, cx, cy, radius, overlay=False):
+    """center of the pad in sector s and ring t"""
+    dx, dy = PAD_SECTORS[s]
+    if overlay:
+        rt = radius * (SHELL_SCALE[t] + SHELL_SCALE[t+1]) / 2
+        rt = rt * COS15
+    else:
+        td = (SHELL_SCALE[t] + SHELL_SCALE[t+1]) / 2
+        rt = radius * COS15 * td
+    return (cx + round_away(rt*dx), cy + round_away(rt*dy))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def starport_pad_centers(cx, cy, radius, backward=False, overlay=False):
+    """
+    centers of all starport pads in one pass, the canvas and the overlay
+    scale in a different order, overlay selects the overlay variant
+    """
+    return tuple(
+        pad_center((s+6) % 12 if backward else s, t, cx, cy, radius, overlay)
+        for (s, t) in STARPORT_PAD_TABLE
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canvas_pad_oval(pad, cx, cy, radius, backward):
+    """oval (x1, y1, x2, y2) of a pad on the canvas, pad may be a (sector, ring) tuple"""
+    if isinstance(pad, tuple):
+        s, t = pad
+        rx, ry = pad_center(s, t, cx, cy, radius)
+    else:
+        pad = (pad-1) % STARPORT_PAD_COUNT
+        s, t = STARPORT_PAD_TABLE[pad]
+        rx, ry = starport_pad_centers(cx, cy, radius, backward)[pad]
+    dot = radius * (SHELL_SCALE[0] - SHELL_SCALE[1]) / 4
+    ov = dot * (3-t) / (4-t)
+    return (rx-ov, ry-ov, rx+ov, ry+ov)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_station(cx, cy, radius, aspect_x):
+    """shell polylines and sector lines with the aspect applied"""
+    shells = tuple(
+        tuple((aspect(aspect_x, x), y) for (x, y) in points + points[:1])
+        for points in starport_shells(cx, cy, radius)
+    )
+    outer = poly_points(cx, cy, radius * SHELL_SCALE[0])
+    inner = poly_points(cx, cy, radius * SHELL_SCALE[-1])
+    lines = tuple(
+        ((aspect(aspect_x, x1), y1), (aspect(aspect_x, x2), y2))
+        for ((x1, y1), (x2, y2)) in zip(outer, inner)
+    )
+    return shells, lines
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_toaster(cx, cy, radius, aspect_x):
+    """right and left toaster polylines for both line offsets"""
+    result = []
+    for ds in range(2):
+        points = toaster(radius, ds)
+        right = tuple((aspect(aspect_x, cx+dx), cy+dy) for (dx, dy) in points)
+        left = tuple((aspect(aspect_x, cx-dx), cy+dy) for (dx, dy) in points)
+        result.append((right, left))
+    return tuple(result)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_station_path(cx, cy, radius, aspect_x):
+    """
+    the whole station as one polyline, the connections run along
+    the sector lines and the already drawn outer and inner shell
+    """
+    shells, lines = overlay_station(cx, cy, radius, aspect_x)
+    path = []
+    for shell in shells:
+        path.extend(shell)
+    # back to the outer shell on sector line 0
+    path.append(lines[0][0])
+    for s, (outer, inner) in enumerate(lines[1:], 1):
+        if s % 2:
+            path.extend((outer, inner))
+        else:
+            path.extend((inner, outer))
+    return tuple(path)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_toaster_paths(cx, cy, radius, aspect_x):
+    """right and left toaster with both line offsets as one polyline each"""
+    (right0, left0), (right1, left1) = overlay_toaster(cx, cy, radius, aspect_x)
+    return right0 + right1[::-1], left0 + left1[::-1]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_pad_rects(pad, cx, cy, radius, backward, aspect_x):
+    """rectangles (x, y, w, h) of the overlay pad marker"""
+    pad = (pad-1) % STARPORT_PAD_COUNT
+    rx, ry = starport_pad_centers(cx, cy, radius, backward, overlay=True)[pad]
+    return tuple(
+        (aspect(aspect_x, rx - px // 2), ry - py // 2, aspect(aspect_x, px), py)
+        for (px, py) in OVERLAY_DOT
+    )
+
+
+# Fleetcarrier
+
+@lru_cache(maxsize=CACHE_SIZE)
+def carrier_pad_list(carrier_type):
+    """pad boxes in carrier units"""
+    pad_list = []
+    if carrier_type == CarrierType.SquadronCarrier:
+        x_offset_list = [SQUADRON_CARRIER_OFFSET, -SQUADRON_CARRIER_OFFSET]
+    else:
+        x_offset_list = [0]
+    for x_offset in x_offset_list:
+        # 8 large pads
+        for y in (22, 2, -18, -38):
+            for x in (-12, 2):
+                pad_list.append((x+x_offset, y, x+x_offset+10, y+16))
+        # 4 medium pads
+        for x in (-22, 15):
+            for y in (25, 10):
+                pad_list.append((x+x_offset, y, x+x_offset+7, y+11))
+        # 4 small pads
+        y = 0
+        if carrier_type == CarrierType.FleetCarrier:
+            small_pads_list = (-24, 14, 20, -18)
+        else:
+            small_pads_list = (-24, -18, 14, 20)
+        for x in small_pads_list:
+            pad_list.append((x+x_offset, y, x+x_offset+4, y+6))
+    return tuple(pad_list)
+
+
+def carrier_units(carrier_type):
+    """width and height of the carrier layout in units"""
+    if carrier_type == CarrierType.SquadronCarrier:
+        return (2 * SQUADRON_CARRIER_OFFSET + FLEETCARRIER_BOX_WIDTH, FLEETCARRIER_BOX_HEIGHT)
+    return (FLEETCARRIER_BOX_WIDTH, FLEETCARRIER_BOX_HEIGHT)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def carrier_pad_boxes(carrier_type, unit_length, cx, cy):
+    """pad boxes (x1, y1, x2, y2) on the canvas"""
+    return tuple(
+        (
+            cx + x1 * unit_length,
+            cy + y1 * unit_length,
+            cx + x2 * unit_length,
+            cy + y2 * unit_length,
+        )
+        for (x1, y1, x2, y2) in carrier_pad_list(carrier_type)
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def carrier_station_center(carrier_type, unit_length, cx, cy, max_x, max_y):
+    """move the center, so all pads are inside (0, 0, max_x, max_y)"""
+    min_x = max_x_pad = cx
+    min_y = max_y_pad = cy
+    for x1, y1, x2, y2 in carrier_pad_list(carrier_type):
+        for check_x in (round_away(cx + x * unit_length) for x in (x1, x2)):
+            min_x = min(min_x, check_x)
+            max_x_pad = max(max_x_pad, check_x)
+        for check_y in (round_away(cy + y * unit_length) for y in (y1, y2)):
+            min_y = min(min_y, check_y)
+            max_y_pad = max(max_y_pad, check_y)
+    if min_x < 0:
+        cx -= min_x
+        max_x_pad -= min_x
+    if min_y < 0:
+        cy -= min_y
+        max_y_pad -= min_y
+    if max_x_pad > max_x:
+        cx -= (max_x_pad - max_x)
+    if max_y_pad > max_y:
+        cy -= (max_y_pad - max_y)
+    return (cx, cy)
+
+
+def overlay_rect(x1, y1, x2, y2, unit_length, cx, cy, aspect_x):
+    x1 = aspect(aspect_x, cx + x1 * unit_length)
+    y1 = round_away(cy + y1 * unit_length)
+    x2 = aspect(aspect_x, cx + x2 * unit_length)
+    y2 = round_away(cy + y2 * unit_length)
+    return min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def overlay_carrier_rects(carrier_type, unit_length, cx, cy, aspect_x):
+    """overlay rectangles (x, y, w, h) of all pads"""
+    return tuple(
+        overlay_rect(x1, y1, x2, y2, unit_length, cx, cy, aspect_x)
+        for (x1, y1, x2, y2) in carrier_pad_list(carrier_type)
+    )
+
+
+CACHED_FUNCTIONS = (
+    poly_points, starport_shells, toaster, starport_pad_centers, canvas_pad_oval,
+    overlay_station, overlay_toaster, overlay_station_path, overlay_toaster_paths, overlay_pad_rects,
+    carrier_pad_list, carrier_pad_boxes, carrier_station_center,
+    overlay_carrier_rects,
+)
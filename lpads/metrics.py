@@ -0,0 +1,86 @@
+"""
+    Runtime counters of the plugin and their Prometheus text format
+"""
+
+import os
+import time
+
+PREFIX = "landingpad_"
+
+# attribute, metric name, help text
+COUNTERS = (
+    ("canvas_full", "canvas_redraws_total{kind=\"full\"}", "Canvas redraws"),
+    ("canvas_resize", "canvas_redraws_total{kind=\"resize\"}", None),
+    ("canvas_pad", "canvas_redraws_total{kind=\"pad\"}", None),
+    ("overlay_frames", "overlay_frames_total", "Frames written to the overlay"),
+    ("overlay_messages", "overlay_messages_total", "Messages written to the overlay"),
+    ("overlay_bytes", "overlay_bytes_total", "JSON bytes written to the overlay"),
+    ("overlay_send_failures", "overlay_send_failures_total", "Failed overlay writes"),
+    ("overlay_connects", "overlay_connects_total", "Successful overlay (re)connects"),
+    ("overlay_connect_failures", "overlay_connect_failures_total", "Failed overlay connects"),
+    ("overlay_dropped", "overlay_dropped_total", "Messages dropped on a full overlay queue"),
+)
+
+
+class Metrics(object):
+    """
+    Plain counters, bumped without locking by the Tk and the
+    overlay sender thread, a lost increment is acceptable
+    """
+    __slots__ = ("started", "docks", "gauges") + tuple(attr for attr, _, _ in COUNTERS)
+
+    def __init__(self):
+        self.started = time.time()
+        self.docks = {}         # station type -> count
+        self.gauges = {}        # name -> (help, function)
+        for attr, _, _ in COUNTERS:
+            setattr(self, attr, 0)
+
+    def count_dock(self, station_type):
+        self.docks[station_type] = self.docks.get(station_type, 0) + 1
+
+    def gauge(self, name, help_text, func):
+        """
+        register a value which is read when exported
+        :param name: metric name without prefix
+        :param help_text: description
+        :param func: returns the current value
+        """
+        self.gauges[name] = (help_text, func)
+
+    def prometheus(self):
+        """:return: all metrics in the Prometheus text format"""
+        lines = [
+            f"# HELP {PREFIX}start_time_seconds Start of the plugin since the epoch",
+            f"# TYPE {PREFIX}start_time_seconds gauge",
+            f"{PREFIX}start_time_seconds {self.started:.3f}",
+            f"# HELP {PREFIX}docks_total Docking permissions by station type",
+            f"# TYPE {PREFIX}docks_total counter",
+        ]
+        for station_type, count in sorted(self.docks.items()):
+            lines.append(f'{PREFIX}docks_total{{station_type="{station_type}"}} {count}')
+        for attr, name, help_text in COUNTERS:
+            if help_text:
+                base_name = name.split("{")[0]
+                lines.append(f"# HELP {PREFIX}{base_name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}{base_name} counter")
+            lines.append(f"{PREFIX}{name} {getattr(self, attr)}")
+        for name, (help_text, func) in sorted(self.gauges.items()):
+            try:
+                value = float(func())
+            except Exception:
+                continue
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            lines.append(f"{PREFIX}{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, filename):
+        """replace the file atomically, for node_exporter's textfile collector"""
+        tmp_name = f"{filename}.tmp"
+        with open(tmp_name, "w", encoding="utf-8") as textfile:
+            textfile.write(self.prometheus())
+        os.replace(tmp_name, filename)
+
+
+metrics = Metrics()
@@ -1,21 +1,65 @@
-import json
 import time
-import socket
-
-try:
-    from EDMCOverlay import edmcoverlay
-except ImportError:
-    try:
-        from edmcoverlay import edmcoverlay
-    except ImportError:
-        edmcoverlay = None
+import queue
+import itertools
+import threading
+from enum import Enum
 
+from .metrics import metrics
 from .misc import round_away
+from .trace import tracer
+from .transport import Message, ModuleTransport, SocketTransport, delete_message
 
 # EDMC Overlay fixed settings
 SERVER_ADDRESS = "127.0.0.1"
 SERVER_PORT = 5010
 
+# sender thread settings
+SEND_QUEUE_SIZE = 512
+STOP_TIMEOUT = 5.0
+MAX_BATCH = 64          # messages per frame
+BATCH_WINDOW = 0.002    # seconds to wait for more messages of a frame
+BACKOFF_MIN = 0.5       # first reconnect delay in seconds
+BACKOFF_MAX = 30.0      # maximum reconnect delay in seconds
+
+# keepalive of the shown shapes
+REFRESH_MARGIN = 5.0    # seconds before the ttl runs out, 0 disables the refresh
+REFRESH_BUDGET = 16     # messages per refresh frame
+
+# queue markers for the sender thread
+_FLUSH = object()
+_STOP = object()
+
+
+# module of an installed overlay plugin, imported with the first Overlay
+edmcoverlay = None
+_edmcoverlay_tried = False
+
+
+def load_edmcoverlay():
+    """
+    import the edmcoverlay module on first use, it isn't
+    needed before a station gets shown
+    :return: the module or None
+    """
+    global edmcoverlay, _edmcoverlay_tried
+    if edmcoverlay is None and not _edmcoverlay_tried:
+        _edmcoverlay_tried = True
+        try:
+            from EDMCOverlay import edmcoverlay
+        except ImportError:
+            try:
+                from edmcoverlay import edmcoverlay
+            except ImportError:
+                edmcoverlay = None
+    return edmcoverlay
+
+
+class OverlayHealth(Enum):
+    Unknown = 0         # not tried to connect yet
+    Connected = 1       # last connect/send was fine
+    Degraded = 2        # link lost, reconnecting
+    Down = 3            # no link, retrying with maximum backoff
+
 
 class Overlay(object):
     """
@@ -29,12 +73,31 @@ class Overlay(object):
     WIDTH_SCALE_ADD = 32
     HEIGHT_SCALE_ADD = 18
 
-    def __init__(self, logger, server=SERVER_ADDRESS, port=SERVER_PORT):
+    def __init__(
+            self, logger, server=SERVER_ADDRESS, port=SERVER_PORT,
+            refresh_margin=REFRESH_MARGIN, refresh_budget=REFRESH_BUDGET,
+    ):
         self.server = server
         self.port = port
-        self.conn = None
         self.logger = logger
+        self.refresh_margin = refresh_margin
+        self.refresh_budget = refresh_budget
+        self.refreshed = 0
         self._overlay = None
+        self._queue = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        self._abort = False         # stop the sender without draining the queue
+        self._sequence = itertools.count(1)
+        self._latest = {}           # id -> sequence of the latest queued message
+        self._live_ids = set()      # ids the server got and not yet deleted
+        self._scene = {}            # id -> message the server should show
+        self._callbacks = {}        # id -> called with the message after it was sent
+        self._expires = {}          # id -> time the server drops the shape
+        self.health = OverlayHealth.Unknown
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        edmcoverlay = load_edmcoverlay()
         if edmcoverlay is not None:
             if hasattr(edmcoverlay.Overlay, "send_command"):
                 logger.info("most likely using edmcoverlay for linux")
@@ -52,6 +115,10 @@ class Overlay(object):
                 self.HEIGHT_SCALE_ADD = 0
             else:
                 logger.info("fallback to use original EDMCOverlay")
+        if self._overlay is not None:
+            self.transport = ModuleTransport(self._overlay)
+        else:
+            self.transport = SocketTransport(server, port)
 
     def config(self, width, height):
         if self._overlay is not None:
@@ -94,37 +161,517 @@ class Overlay(object):
 
     def connect(self):
         """
-        open the connection
+        open the connection, done by the sender thread which
+        also reconnects if the link gets lost
         :return:
         """
-        if self._overlay is not None:
-            self._overlay.connect()
-        elif self.conn is None:
+        self.start()
+
+    def start(self):
+        """
+        start the sender thread, if not already running
+        :return:
+        """
+        with self._sender_lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._abort = False
+                self._sender = threading.Thread(
+                    target=self._sender_loop, name="LandingPad-Overlay", daemon=True,
+                )
+                self._sender.start()
+
+    def stop(self, wait=True, timeout=STOP_TIMEOUT):
+        """
+        let the sender thread drain the queue and exit
+        :param wait: block until the thread has finished
+        :param timeout: maximum seconds to wait
+        :return: True if the thread is no longer running
+        """
+        with self._sender_lock:
+            sender = self._sender
+        if sender is None or not sender.is_alive():
+            return True
+        # not under the lock, the sender needs it to drain the queue
+        try:
+            self._queue.put((_STOP, None, None, None), block=wait, timeout=timeout)
+        except queue.Full:
+            # stop after the current frame, without the queued rest
+            self.logger.warning("Overlay queue full, stopping without sending the rest")
+            self._abort = True
+        if wait:
+            sender.join(timeout)
+            return not sender.is_alive()
+        return False
+
+    def flush(self, timeout=None):
+        """
+        wait until every message queued so far has been sent
+        :param timeout: maximum seconds to wait
+        :return: True if the queue was drained in time
+        """
+        self.start()
+        barrier = threading.Event()
+        try:
+            self._queue.put((_FLUSH, barrier, None, None), timeout=timeout)
+        except queue.Full:
+            return False
+        return barrier.wait(timeout)
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def send_raw(self, msg, delay=100, callback=None):
+        """
+        Queue a dict for the sender thread
+        :param msg:
+        :param delay: pause in ms after sending this message
+        :param callback: called by the sender thread with the message, once sent
+        :return:
+        """
+        self.start()
+        # under the lock, the sender must not see the message before _latest
+        with self._sender_lock:
+            sequence = next(self._sequence)
             try:
-                self.conn = socket.socket()
-                self.conn.connect((self.server, self.port))
-            except Exception as err:
-                self.logger.warning("Can't connect to EDMC Overlay", exc_info=err)
-                self.conn = None
+                self._queue.put_nowait((msg, delay, sequence, callback))
+            except queue.Full:
+                sequence = None
+            else:
+                self._latest[msg.get("id")] = sequence
+        if sequence is None:
+            # the older queued message for the id stays the latest
+            metrics.overlay_dropped += 1
+            self.logger.warning(f"Overlay queue full, dropped message {msg.get('id')}")
+
+    def clear(self, ids, delay=100, callback=None):
+        """
+        remove shapes in one go, the deletes are sent batched
+        :param ids: ids of the shapes
+        :param delay: pause in ms after sending
+        :param callback: see send_raw
+        :return:
+        """
+        for gfx_id in ids:
+            self.send_raw(delete_message(gfx_id), delay, callback)
 
-    def send_raw(self, msg, delay=100):
+    def is_obsolete(self, msg, sequence):
         """
-        Encode a dict and send it to the server
+        check if a queued message doesn't change the final state anymore
         :param msg:
+        :param sequence:
         :return:
         """
-        if self._overlay is not None:
-            self._overlay.send_raw(msg)
-            if delay:
-                delay = min(max(delay, 0), 500)
-                time.sleep(float(delay) / 1000.0)
-        elif self.conn:
+        gfx_id = msg.get("id")
+        with self._sender_lock:
+            if self._latest.get(gfx_id) != sequence:
+                # a newer message for this id is queued
+                return True
+            del self._latest[gfx_id]
+        if msg.get("ttl") == 0:
+            # nothing to delete, if the server never got it
+            return gfx_id not in self._live_ids and gfx_id not in self._scene
+        return False
+
+    def _next_batch(self):
+        """
+        collect the queued messages for the next frame, a queue
+        marker always ends the frame
+        :return: list of queue items, empty if it's time to reconnect or refresh
+        """
+        try:
+            if self.transport.connected:
+                item = self._queue.get(timeout=self._refresh_timeout())
+            else:
+                item = self._queue.get(timeout=max(self._retry_at - time.monotonic(), 0.01))
+        except queue.Empty:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < MAX_BATCH and item[0] is not _FLUSH and item[0] is not _STOP:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    item = self._queue.get(timeout=timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _sender_loop(self):
+        self._reconnect()
+        while not self._abort:
+            batch = self._next_batch()
+            if not batch:
+                if self._reconnect():
+                    self._refresh()
+                continue
             try:
-                self.conn.send(json.dumps(msg).encode())
-                self.conn.send(b"\n")
-                if delay:
-                    delay = min(max(delay, 0), 500)
-                    time.sleep(float(delay) / 1000.0)
+                msgs = []
+                callbacks = []
+                delay = 0
+                for msg, msg_delay, sequence, callback in batch:
+                    if msg is _FLUSH or msg is _STOP:
+                        continue
+                    if self.is_obsolete(msg, sequence):
+                        continue
+                    for gfx_id in self.affected_ids(msg, self._scene):
+                        del self._scene[gfx_id]
+                    if msg.get("ttl") != 0:
+                        self._scene[msg.get("id")] = msg
+                        self._callbacks[msg.get("id")] = callback
+                    msgs.append(msg)
+                    callbacks.append(callback)
+                    delay = max(delay, msg_delay or 0)
+                if msgs:
+                    if not self.transport.connected:
+                        # the replay contains these messages
+                        self._reconnect()
+                    elif self._send_frame(msgs):
+                        for msg, callback in zip(msgs, callbacks):
+                            self.mark_sent(msg, callback)
+                        if delay:
+                            delay = min(max(delay, 0), 500)
+                            time.sleep(float(delay) / 1000.0)
+                marker, barrier = batch[-1][:2]
+                if marker is _FLUSH:
+                    barrier.set()
+                elif marker is _STOP:
+                    return
             except Exception as err:
-                self.logger.warning("Can't send to EDMC Overlay", exc_info=err)
-                self.conn = None
+                self.logger.warning("Overlay sender failed", exc_info=err)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def affected_ids(msg, ids):
+        """
+        :return: the ids out of ids a delete message removes
+        """
+        if msg.get("ttl") == 0 and msg.get("id") in ids:
+            return [msg.get("id")]
+        return []
+
+    def mark_sent(self, msg, callback=None):
+        for gfx_id in self.affected_ids(msg, self._live_ids):
+            self._live_ids.discard(gfx_id)
+            self._expires.pop(gfx_id, None)
+            if gfx_id not in self._scene:
+                self._callbacks.pop(gfx_id, None)
+        if msg.get("ttl") != 0:
+            self._live_ids.add(msg.get("id"))
+            if msg.get("ttl"):
+                self._expires[msg.get("id")] = time.monotonic() + msg.get("ttl")
+        if callback is not None:
+            callback(msg)
+
+    def _refresh_timeout(self):
+        """seconds until the next shape needs a refresh, None if none does"""
+        if not self.refresh_margin or not self._expires:
+            return None
+        return max(min(self._expires.values()) - self.refresh_margin - time.monotonic(), 0.01)
+
+    def _refresh(self):
+        """
+        resend the shapes of the scene which would expire soon,
+        the shapes are already encoded, so this is cheap
+        """
+        if not self.refresh_margin:
+            return
+        due = time.monotonic() + self.refresh_margin
+        msgs = []
+        for gfx_id, expires in list(self._expires.items()):
+            if gfx_id not in self._scene:
+                del self._expires[gfx_id]
+            elif expires <= due and len(msgs) < self.refresh_budget:
+                msgs.append(self._scene[gfx_id])
+        if msgs and self._send_frame(msgs):
+            for msg in msgs:
+                self.mark_sent(msg)
+            self.refreshed += len(msgs)
+
+    def _set_health(self, health):
+        if health != self.health:
+            if health == OverlayHealth.Connected:
+                self.logger.info("EDMC Overlay connected")
+            elif self.health == OverlayHealth.Unknown:
+                self.logger.warning("EDMC Overlay not available, retrying in the background")
+            else:
+                self.logger.warning(f"EDMC Overlay link is {health.name.lower()}")
+            self.health = health
+
+    def _reconnect(self):
+        """
+        try to (re)connect if the backoff time is over and
+        replay the current scene on success
+        :return: True if connected
+        """
+        if self.transport.connected:
+            return True
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        try:
+            self.transport.connect()
+        except Exception as err:
+            metrics.overlay_connect_failures += 1
+            self.logger.debug("Can't connect to EDMC Overlay", exc_info=err)
+            self._backoff = min(max(self._backoff * 2, BACKOFF_MIN), BACKOFF_MAX)
+            self._retry_at = now + self._backoff
+            if self._backoff >= BACKOFF_MAX or self.health in (OverlayHealth.Unknown, OverlayHealth.Down):
+                self._set_health(OverlayHealth.Down)
+            else:
+                self._set_health(OverlayHealth.Degraded)
+            return False
+        metrics.overlay_connects += 1
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._set_health(OverlayHealth.Connected)
+        self._replay()
+        return True
+
+    def _replay(self):
+        # bring the server in sync with the current scene
+        msgs = [delete_message(gfx_id) for gfx_id in self._live_ids if gfx_id not in self._scene]
+        msgs.extend(self._scene.values())
+        if msgs and self._send_frame(msgs):
+            for msg in msgs:
+                self.mark_sent(msg, self._callbacks.get(msg.get("id")))
+
+    @tracer.timed("overlay.send_frame")
+    def _send_frame(self, msgs):
+        """
+        send a frame of messages to the server
+        :param msgs: list of dicts
+        :return: True if the frame was sent
+        """
+        if not self.transport.connected:
+            return False
+        sent_bytes = getattr(self.transport, "bytes", 0)
+        try:
+            self.transport.send_frame(msgs)
+            metrics.overlay_frames += 1
+            metrics.overlay_messages += len(msgs)
+            metrics.overlay_bytes += getattr(self.transport, "bytes", 0) - sent_bytes
+            return True
+        except Exception as err:
+            metrics.overlay_send_failures += 1
+            self.logger.warning("Can't send to EDMC Overlay", exc_info=err)
+            self.transport.close()
+            self._set_health(OverlayHealth.Degraded)
+        return False
+
+
+class IdRegistry(object):
+    """
+    Graphics ids of a station overlay by layer, and the ids the
+    server has got, acknowledged by a successful send
+    """
+
+    __slots__ = ("layers", "acked")
+
+    def __init__(self, layer_names):
+        self.layers = {name: {} for name in layer_names}
+        self.acked = set()
+
+    def __len__(self):
+        return sum(len(shapes) for shapes in self.layers.values())
+
+    def __contains__(self, gfx_id):
+        return any(gfx_id in shapes for shapes in self.layers.values())
+
+    def shapes(self, layer):
+        return self.layers[layer]
+
+    def replace(self, layer, shapes):
+        """
+        :param layer: layer name
+        :param shapes: dict of id -> message
+        :return: the shapes registered before
+        """
+        old_shapes = self.layers[layer]
+        self.layers[layer] = shapes
+        return old_shapes
+
+    def add(self, layer, gfx_id, msg):
+        self.layers[layer][gfx_id] = msg
+
+    def remove(self, layer, gfx_id):
+        return self.layers[layer].pop(gfx_id, None)
+
+    def ids(self):
+        """all ids, the last layer first"""
+        for shapes in reversed(self.layers.values()):
+            yield from reversed(shapes)
+
+    def clear(self):
+        """
+        forget all layers
+        :return: list of the ids which were registered
+        """
+        ids = list(self.ids())
+        for layer in self.layers:
+            self.layers[layer] = {}
+        return ids
+
+    def leaked(self):
+        """ids the server still shows, but no layer knows anymore"""
+        return [gfx_id for gfx_id in tuple(self.acked) if gfx_id not in self]
+
+    def on_sent(self, msg):
+        """called by the sender thread after msg was sent"""
+        if msg.get("ttl") == 0:
+            self.acked.discard(msg.get("id"))
+        else:
+            self.acked.add(msg.get("id"))
+
+
+class LandingPadsOverlay(object):
+    """
+    Retained scene of a station on the overlay, only the
+    difference to the last drawn scene is sent
+    """
+
+    layer_names = ()
+    # merge the primitives of a layer into as few messages as possible
+    compact = True
+    # attributes the shapes of all layers depend on
+    scene_attrs = ()
+
+    def init_scene(self):
+        self.registry = IdRegistry(self.layer_names)
+        self.layer_cache = {}
+        self.show = False
+
+    def invalidate_layers(self, kwargs):
+        """
+        forget the prepared layers if a scene attribute gets changed
+        :param kwargs: config arguments, before they are applied
+        """
+        for attr_name, value in kwargs.items():
+            if attr_name != "cur_pad" and getattr(self, attr_name, None) != value:
+                self.layer_cache.clear()
+                return
+
+    def aspect(self, x):
+        return round_away(self.aspect_x * x)
+
+    def build_layer(self, name):
+        raise NotImplementedError
+
+    def messages(self, primitives):
+        """
+        overlay backend of the display lists
+        :param primitives: display list
+        :return: dict of id -> message
+        """
+        shapes = {}
+        for prim in primitives:
+            gfx_id = f"{self.id_prefix}{prim.key}"
+            if prim.kind == "rect":
+                (x1, y1), (x2, y2) = prim.coords
+                msg = {"id": gfx_id, "shape": "rect", "color": prim.color}
+                if prim.fill:
+                    msg["fill"] = prim.fill
+                msg.update(ttl=self.ttl, x=x1, y=y1, w=x2-x1, h=y2-y1)
+            else:
+                coords = prim.coords + prim.coords[:1] if prim.kind == "polygon" else prim.coords
+                msg = {
+                    "id": gfx_id,
+                    "color": prim.color,
+                    "shape": "vect",
+                    "ttl": self.ttl,
+                    "vector": [{"x": x, "y": y} for (x, y) in coords],
+                }
+            shapes[gfx_id] = msg
+        return shapes
+
+    def get_layer(self, name):
+        """
+        shapes of a layer as encoded messages, only built once
+        per set of scene parameters
+        :param name: layer name
+        :return: dict of id -> Message
+        """
+        key = (name, self.cur_pad if name == "pad" else None) + tuple(
+            getattr(self, attr_name) for attr_name in self.scene_attrs
+        )
+        shapes = self.layer_cache.get(key)
+        if shapes is None:
+            shapes = {gfx_id: Message(msg) for gfx_id, msg in self.build_layer(name).items()}
+            self.layer_cache[key] = shapes
+        return shapes
+
+    def update_layer(self, name, shapes):
+        """
+        send the minimal set of deletes and drawings to get from the
+        retained shapes of a layer to the new ones
+        :param name: layer name
+        :param shapes: dict of id -> message
+        :return: number of messages sent
+        """
+        if not self.overlay:
+            return 0
+        start = time.perf_counter()
+        old_shapes = self.registry.replace(name, shapes)
+        count = 0
+        for gfx_id in reversed(old_shapes):
+            if gfx_id not in shapes:
+                self.overlay.send_raw(delete_message(gfx_id), self.ms_delay, self.registry.on_sent)
+                count += 1
+        changed = []
+        for gfx_id, msg in shapes.items():
+            old_msg = old_shapes.get(gfx_id)
+            if old_msg is not msg and old_msg != msg:
+                changed.append(msg)
+        for msg in changed:
+            callback = self.registry.on_sent
+            if name == "pad" and msg is changed[-1]:
+                # the last pad message makes the pad visible
+                callback = self.traced_callback(tracer.current)
+            self.overlay.send_raw(msg, self.ms_delay, callback)
+        count += len(changed)
+        tracer.record(f"overlay.draw_{name}", (time.perf_counter() - start) * 1000)
+        return count
+
+    def traced_callback(self, trace):
+        """
+        :param trace: Trace of the pad assignment or None
+        :return: sent callback which also finishes the trace
+        """
+        if trace is None:
+            return self.registry.on_sent
+
+        def on_sent(msg):
+            self.registry.on_sent(msg)
+            tracer.finish("pad.overlay", trace)
+        return on_sent
+
+    def redraw_overlay(self):
+        # update the station with a very small delay
+        old_ms_delay = self.ms_delay
+        self.ms_delay = min(old_ms_delay, 5)
+        self.show_overlay()
+        self.ms_delay = old_ms_delay
+
+    def hide_overlay(self):
+        if self.show and self.overlay:
+            ids = self.registry.clear()
+            if ids:
+                self.overlay.clear(ids, self.ms_delay, self.registry.on_sent)
+            self.show = False
+
+    def show_overlay(self):
+        if self.overlay:
+            if not self.show:
+                # shapes of an earlier drawing the server didn't get the delete for
+                leaked = self.registry.leaked()
+                if leaked:
+                    self.overlay.logger.debug(f"Removing {len(leaked)} leaked overlay shapes")
+                    self.overlay.clear(leaked, self.ms_delay, self.registry.on_sent)
+            for name in self.layer_names:
+                self.update_layer(name, self.get_layer(name))
+            self.show = True
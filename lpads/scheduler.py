@@ -0,0 +1,70 @@
+"""
+    Coalesce canvas redraws into one redraw per idle cycle
+"""
+
+import time
+
+# minimum seconds between two rendered frames
+MIN_FRAME_TIME = 0.016
+
+
+class RenderScheduler(object):
+    """
+    Canvases mark themselves dirty, all pending changes are
+    rendered together once Tk is idle
+    """
+
+    def __init__(self, min_frame_time=MIN_FRAME_TIME):
+        self.min_frame_time = min_frame_time
+        self.requested = 0      # redraw requests
+        self.performed = 0      # canvas renders
+        self.frames = 0         # scheduler runs
+        self._dirty = []
+        self._widget = None
+        self._after_id = None
+        self._last_frame = 0.0
+
+    @property
+    def pending(self):
+        return self._after_id is not None
+
+    def request(self, canvas):
+        self.requested += 1
+        if canvas not in self._dirty:
+            self._dirty.append(canvas)
+        if self._after_id is None:
+            self._widget = canvas
+            wait = self._last_frame + self.min_frame_time - time.monotonic()
+            if wait > 0:
+                self._after_id = canvas.after(int(wait * 1000) + 1, self.run)
+            else:
+                self._after_id = canvas.after_idle(self.run)
+
+    def cancel(self, canvas):
+        if canvas in self._dirty:
+            self._dirty.remove(canvas)
+
+    def run(self):
+        self._after_id = None
+        dirty, self._dirty = self._dirty, []
+        for canvas in dirty:
+            canvas.render()
+            self.performed += 1
+        self.frames += 1
+        self._last_frame = time.monotonic()
+
+    def flush(self):
+        """render everything pending right now"""
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self.run()
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "performed": self.performed,
+            "frames": self.frames,
+        }
+
+
+render_scheduler = RenderScheduler()
@@ -0,0 +1,127 @@
+"""
+    Self benchmark, cycle through pads from the running Tk loop
+"""
+
+import threading
+import time
+
+from .scheduler import render_scheduler
+from .trace import percentile
+
+STEP_INTERVAL = 10      # ms between two steps
+HEARTBEAT = 10          # ms interval of the Tk stall probe
+FLUSH_TIMEOUT = 5.0     # seconds to wait for the overlay per step
+
+
+class PadBenchmark(object):
+    """
+    Run a list of steps one by one from the Tk loop. Every step is
+    rendered right away, then the overlay queue is waited for in a
+    helper thread, so Tk keeps running. A heartbeat measures how
+    late the Tk loop gets.
+    """
+
+    def __init__(self, widget, steps, logger, get_overlay=None, on_done=None):
+        """
+        :param widget: any Tk widget, for the timers
+        :param steps: list of (label, function)
+        :param logger: summary goes here
+        :param get_overlay: returns the Overlay or None
+        :param on_done: called with the summary dict at the end
+        """
+        self.widget = widget
+        self.steps = list(steps)
+        self.logger = logger
+        self.get_overlay = get_overlay
+        self.on_done = on_done
+        self.running = False
+        self.step_ms = []
+        self.overlay_ms = []
+        self.overlay_timeouts = 0
+        self.max_stall = 0.0
+        self._index = 0
+        self._beat = 0.0
+        self._started = 0.0
+        self._step_start = 0.0
+        self._flushed = threading.Event()
+        self._flush_ok = False
+
+    def start(self):
+        self.running = True
+        self._started = self._beat = time.perf_counter()
+        self.widget.after(HEARTBEAT, self.heartbeat)
+        self.widget.after(STEP_INTERVAL, self.step)
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        self.max_stall = max(self.max_stall, (now - self._beat) * 1000 - HEARTBEAT)
+        if self.running:
+            self._beat = now
+            self.widget.after(HEARTBEAT, self.heartbeat)
+
+    def step(self):
+        if self._index >= len(self.steps):
+            self.finish()
+            return
+        _, action = self.steps[self._index]
+        self._index += 1
+        self._step_start = start = time.perf_counter()
+        action()
+        render_scheduler.flush()
+        self.widget.update_idletasks()
+        self.step_ms.append((time.perf_counter() - start) * 1000)
+        overlay = self.get_overlay() if self.get_overlay else None
+        if overlay:
+            self._flushed.clear()
+            threading.Thread(target=self.wait_overlay, args=(overlay,), daemon=True).start()
+            self.widget.after(1, self.poll_overlay)
+        else:
+            self.widget.after(STEP_INTERVAL, self.step)
+
+    def wait_overlay(self, overlay):
+        self._flush_ok = overlay.flush(FLUSH_TIMEOUT)
+        self._flushed.set()
+
+    def poll_overlay(self):
+        if not self._flushed.is_set():
+            self.widget.after(1, self.poll_overlay)
+            return
+        if self._flush_ok:
+            self.overlay_ms.append((time.perf_counter() - self._step_start) * 1000)
+        else:
+            self.overlay_timeouts += 1
+        self.widget.after(STEP_INTERVAL, self.step)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._started
+        result = {
+            "pads": len(self.step_ms),
+            "seconds": round(elapsed, 3),
+            "pads_per_sec": round(len(self.step_ms) / elapsed, 1) if elapsed else 0.0,
+            "max_stall_ms": round(self.max_stall, 3),
+            "overlay_timeouts": self.overlay_timeouts,
+        }
+        for name, samples in (("step_ms", self.step_ms), ("overlay_ms", self.overlay_ms)):
+            values = sorted(samples)
+            if values:
+                result[name] = {
+                    "p50": round(percentile(values, 50), 3),
+                    "p95": round(percentile(values, 95), 3),
+                    "max": round(values[-1], 3),
+                }
+        return result
+
+    def finish(self):
+        self.running = False
+        result = self.summary()
+        lines = [
+            f"pad benchmark: {result['pads']} pads in {result['seconds']} s, {result['pads_per_sec']} pads/s",
+            f"  step (canvas)     {result.get('step_ms')}",
+            f"  overlay written   {result.get('overlay_ms', 'no overlay')}",
+            f"  worst Tk stall    {result['max_stall_ms']} ms",
+        ]
+        if self.overlay_timeouts:
+            lines.append(f"  overlay timeouts  {self.overlay_timeouts}")
+        self.logger.info("\n".join(lines))
+        if self.on_done:
+            self.on_done(result)
@@ -0,0 +1,102 @@
+"""
+    Cache of pre-rendered station images for the canvas, needs Pillow
+"""
+
+from collections import OrderedDict
+
+# pixel budget of all cached images (4 bytes per pixel)
+MAX_PIXELS = 2 * 1024 * 1024
+
+# Pillow modules, imported with the first image
+Image = ImageDraw = ImageTk = None
+_pillow_tried = False
+
+
+def available():
+    """
+    import Pillow on first use, it costs more than the rest
+    of the plugin start and is only needed for the images
+    :return: True if Pillow is installed
+    """
+    global Image, ImageDraw, ImageTk, _pillow_tried
+    if Image is None and not _pillow_tried:
+        _pillow_tried = True
+        try:
+            from PIL import Image, ImageDraw, ImageTk
+        except ImportError:
+            Image = ImageDraw = ImageTk = None
+    return Image is not None
+
+
+def new_image(width, height):
+    """transparent image and a draw object for it"""
+    image = Image.new("RGBA", (max(int(width), 1), max(int(height), 1)), (0, 0, 0, 0))
+    return image, ImageDraw.Draw(image)
+
+
+def draw_primitives(draw, primitives, rgba):
+    """
+    draw a display list into an image
+    :param draw: ImageDraw of the image
+    :param primitives: display list
+    :param rgba: function to convert a colour name to an RGBA tuple
+    """
+    for prim in primitives:
+        color = rgba(prim.color or "black")
+        if prim.kind == "polygon":
+            draw.line(prim.coords + prim.coords[:1], fill=color, width=prim.width, joint="curve")
+        elif prim.kind == "polyline":
+            draw.line(prim.coords, fill=color, width=prim.width, joint="curve")
+        elif prim.kind == "line":
+            draw.line(prim.coords, fill=color, width=prim.width)
+        else:
+            (x1, y1), (x2, y2) = prim.coords
+            box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+            fill = rgba(prim.fill) if prim.fill else None
+            if prim.kind == "rect":
+                draw.rectangle(box, outline=color, fill=fill, width=prim.width)
+            else:
+                draw.ellipse(box, outline=color, fill=fill, width=prim.width)
+
+
+class SpriteCache(object):
+    """
+    LRU of rendered station images, bounded by the sum of their pixels
+    """
+
+    def __init__(self, max_pixels=MAX_PIXELS):
+        self.max_pixels = max_pixels
+        self.pixels = 0
+        self.hits = 0
+        self.misses = 0
+        self._sprites = OrderedDict()
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def get(self, key, render, master=None):
+        """
+        return the cached PhotoImage for key, render(): PIL image is
+        only called on a cache miss
+        """
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        image = render()
+        sprite = ImageTk.PhotoImage(image, master=master)
+        self._sprites[key] = sprite
+        self.pixels += sprite.width() * sprite.height()
+        while self.pixels > self.max_pixels and len(self._sprites) > 1:
+            _, old = self._sprites.popitem(last=False)
+            self.pixels -= old.width() * old.height()
+        return sprite
+
+    def clear(self):
+        self._sprites.clear()
+        self.pixels = 0
+
+
+sprite_cache = SpriteCache()
@@ -0,0 +1,128 @@
+"""
+    Latency tracing from the journal entry to the visible pad
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+
+# samples kept per span for the rolling percentiles
+WINDOW = 500
+
+
+def percentile(values, p):
+    """nearest rank percentile of sorted values"""
+    return values[max(-(-p * len(values) // 100), 1) - 1]
+
+
+class Trace(object):
+    """
+    One pad assignment, the stages are recorded once
+    relative to the dispatch of the journal entry
+    """
+    __slots__ = ("start", "finished")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.finished = set()
+
+
+class Tracer(object):
+    """
+    Rolling durations of spans in ms, recorded by the Tk and
+    the overlay sender thread alike
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.current = None     # latest Trace
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, ms):
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(ms)
+
+    def timed(self, name):
+        """decorator, record the run time of the function as span name"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    def begin(self, timestamp=None):
+        """
+        start the trace of a pad assignment
+        :param timestamp: journal timestamp, like 2025-01-01T12:00:00Z
+        :return: the new Trace
+        """
+        self.current = Trace()
+        if timestamp:
+            # not needed before the first pad
+            import calendar
+            try:
+                written = calendar.timegm(time.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ"))
+            except ValueError:
+                pass
+            else:
+                # the journal has whole seconds only
+                self.record("journal.age", (time.time() - written) * 1000)
+        return self.current
+
+    def finish(self, name, trace=None):
+        """
+        record the time from the start of the trace to now as
+        stage name, only the first time for each trace
+        :param name: stage name
+        :param trace: Trace, default is the current one
+        """
+        trace = trace or self.current
+        if trace is not None and name not in trace.finished:
+            trace.finished.add(name)
+            self.record(name, (time.perf_counter() - trace.start) * 1000)
+
+    def summary(self):
+        """:return: dict of span -> count, p50, p95, p99 and max in ms"""
+        with self._lock:
+            items = list(self._samples.items())
+        result = {}
+        for name, samples in sorted(items):
+            values = sorted(samples)
+            if not values:
+                continue
+            result[name] = {"count": len(values)}
+            for p in (50, 95, 99):
+                result[name][f"p{p}"] = round(percentile(values, p), 3)
+            result[name]["max"] = round(values[-1], 3)
+        return result
+
+    def log_summary(self, logger):
+        summary = self.summary()
+        if not summary:
+            logger.info("latency trace: no samples")
+            return
+        lines = [f"latency trace, last {self.window} samples per span in ms:"]
+        for name, stats in summary.items():
+            lines.append(
+                f"  {name:28} n={stats['count']:<4} p50={stats['p50']:<9} p95={stats['p95']:<9}"
+                f" p99={stats['p99']:<9} max={stats['max']}"
+            )
+        logger.info("\n".join(lines))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+        self.current = None
+
+
+tracer = Tracer()
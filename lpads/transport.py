@@ -0,0 +1,152 @@
+"""
+    Transports used by the overlay sender thread
+"""
+
+import json
+import socket
+from functools import lru_cache
+
+# socket settings
+CONNECT_TIMEOUT = 2.0
+SEND_TIMEOUT = 2.0
+# buffers per sendmsg call, below the usual IOV_MAX
+MAX_IOV = 512
+
+
+class Message(dict):
+    """
+    Overlay message which keeps its encoded bytes,
+    must not be changed after the first send
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._data = None
+
+    def encoded(self):
+        if self._data is None:
+            self._data = json.dumps(self).encode() + b"\n"
+        return self._data
+
+
+@lru_cache(maxsize=1024)
+def delete_message(gfx_id):
+    return Message(id=gfx_id, ttl=0)
+
+
+def encode(msg):
+    if isinstance(msg, Message):
+        return msg.encoded()
+    return json.dumps(msg).encode() + b"\n"
+
+
+class SocketTransport(object):
+    """
+    Newline delimited JSON over TCP for the original EDMCOverlay,
+    a frame of messages is written with a single sendall
+    """
+
+    def __init__(
+            self, server, port,
+            connect_timeout=CONNECT_TIMEOUT, send_timeout=SEND_TIMEOUT,
+    ):
+        self.server = server
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.send_timeout = send_timeout
+        self.conn = None
+        self.messages = 0
+        self.bytes = 0
+        self.frames = 0
+
+    @property
+    def connected(self):
+        return self.conn is not None
+
+    def connect(self):
+        if self.conn is None:
+            conn = socket.create_connection((self.server, self.port), timeout=self.connect_timeout)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.settimeout(self.send_timeout)
+            self.conn = conn
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+
+    @staticmethod
+    def encode(msg):
+        return encode(msg)
+
+    def write(self, buffers):
+        """
+        write the buffers without joining them, if the socket supports
+        scatter/gather IO
+        :param buffers: list of bytes
+        """
+        if not hasattr(self.conn, "sendmsg"):
+            self.conn.sendall(b"".join(buffers))
+            return
+        views = [memoryview(data) for data in buffers]
+        start = 0
+        while start < len(views):
+            sent = self.conn.sendmsg(views[start:start+MAX_IOV])
+            # skip the written buffers and slice a partly written one
+            while sent and sent >= len(views[start]):
+                sent -= len(views[start])
+                start += 1
+            if sent:
+                views[start] = views[start][sent:]
+
+    def send_frame(self, msgs):
+        buffers = [encode(msg) for msg in msgs]
+        try:
+            self.write(buffers)
+        except Exception:
+            self.close()
+            raise
+        self.messages += len(msgs)
+        self.bytes += sum(len(data) for data in buffers)
+        self.frames += 1
+
+
+class ModuleTransport(object):
+    """
+    The edmcoverlay module backends take one dict at a time,
+    bytes counts the size of the same messages as JSON
+    """
+
+    def __init__(self, overlay):
+        self.overlay = overlay
+        self._connected = False
+        self.messages = 0
+        self.bytes = 0
+        self.frames = 0
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def connect(self):
+        self.overlay.connect()
+        self._connected = True
+
+    def close(self):
+        self._connected = False
+
+    def send_frame(self, msgs):
+        try:
+            for msg in msgs:
+                self.overlay.send_raw(msg)
+        except Exception:
+            self.close()
+            raise
+        self.messages += len(msgs)
+        self.bytes += sum(len(encode(msg)) for msg in msgs)
+        self.frames += 1
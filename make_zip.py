@@ -21,10 +21,18 @@ def main():
         "LICENSE",
         "lpads/__init__.py",
         "lpads/base.py",
+        "lpads/display.py",
         "lpads/fleetcarrier.py",
+        "lpads/geometry.py",
+        "lpads/metrics.py",
         "lpads/misc.py",
         "lpads/overlay.py",
+        "lpads/scheduler.py",
+        "lpads/selfbench.py",
+        "lpads/sprites.py",
         "lpads/starport.py",
+        "lpads/trace.py",
+        "lpads/transport.py",
     ]
     set_VERSION(file_list[0])
     base_name = "LandingPad"
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+#
+# Micro-benchmark and golden output check of the station geometry.
+#
+#   bench_geometry.py --check          compare against golden_geometry.json
+#   bench_geometry.py --update         write the current results as golden
+#   bench_geometry.py --bench          ops/sec of every case
+#   bench_geometry.py --bench --baseline before.json
+#
+# A change to the geometry (caching, ...) should pass --check and
+# not lose ops/sec.
+# cached_hit_rate below 1.0 means a case doesn't fit into the caches,
+# None that the case uses no cached function.
+#
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lpads import CarrierType, FleetCarrierPads, FleetCarrierPadsOverlay, StarportPads, geometry
+from lpads.misc import round_away
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_geometry.json")
+
+# canvas widths around the steps of the line width
+SIZES = (40, 50, 99, 100, 150, 151, 233, 300, 499, 500, 777, 1024)
+# overlay radii and centers, some of them off screen
+RADII = (20, 50, 100, 137, 300)
+CENTERS = ((100, 490), (0, 0), (1900, 1060), (960, 540))
+BACKWARD = (False, True)
+ROUND_VALUES = tuple(v / 4 for v in range(-40, 41)) + (-2.5000001, -0.4999999, 0.4999999, 2.5000001)
+
+
+def starport(size):
+    canvas = StarportPads.__new__(StarportPads)
+    canvas.calc_values()
+    canvas.width = canvas.height = size
+    canvas.calc_layout()
+    return canvas
+
+
+def fleetcarrier(carrier_type, size, backward):
+    canvas = FleetCarrierPads.__new__(FleetCarrierPads)
+    canvas.carrier_type = carrier_type
+    canvas.backward = backward
+    canvas.width = canvas.height = size
+    canvas.calc_values()
+    canvas.calc_layout()
+    return canvas
+
+
+def carrier_overlay(carrier_type, radius, center, backward):
+    return FleetCarrierPadsOverlay(
+        None, backward, radius, center[0], center[1], 1920.0, 1080.0,
+        0, "#ffffff", "yellow", 30, None, None, carrier_type,
+    )
+
+
+# every case is (name, list of argument tuples, function)
+
+def poly_points_case():
+    calls = []
+    for size in SIZES:
+        canvas = starport(size)
+        calls.extend((canvas, canvas.centerX, canvas.centerY, canvas.radiusP * s) for s in canvas.shell_scale)
+    return calls, lambda canvas, cx, cy, r: canvas.get_poly_points(cx, cy, r)
+
+
+def toaster_case():
+    calls = [(starport(size), s) for size in SIZES for s in (0, 1)]
+    return calls, lambda canvas, s: canvas.get_toaster(canvas.radiusP, s)
+
+
+def pad_coords_case():
+    canvas = starport(300)
+    calls = [(canvas, pad) for pad in range(1, geometry.STARPORT_PAD_COUNT + 1)]
+    return calls, lambda canvas, pad: canvas.get_pad_coords(pad)
+
+
+def carrier_values_case():
+    calls = [(fleetcarrier(carrier_type, 300, False),) for carrier_type in CarrierType]
+
+    def run(canvas):
+        canvas.calc_values()
+        return canvas.pad_list
+    return calls, run
+
+
+def carrier_boxes_case():
+    calls = [
+        (fleetcarrier(carrier_type, size, backward),)
+        for carrier_type in CarrierType for size in SIZES for backward in BACKWARD
+    ]
+    return calls, lambda canvas: canvas.get_pad_boxes()
+
+
+def station_box_case():
+    calls = [
+        (carrier_overlay(carrier_type, radius, center, backward), center)
+        for carrier_type in CarrierType for radius in RADII for center in CENTERS for backward in BACKWARD
+    ]
+
+    def run(overlay, center):
+        overlay.center_x, overlay.center_y = center
+        overlay.check_station_box()
+        return overlay.center_x, overlay.center_y
+    return calls, run
+
+
+def coords_to_rect_case():
+    calls = []
+    for carrier_type in CarrierType:
+        for radius in RADII:
+            for backward in BACKWARD:
+                overlay = carrier_overlay(carrier_type, radius, CENTERS[0], backward)
+                overlay.aspect_x = 0.8333
+                calls.extend((overlay, box) for box in geometry.carrier_pad_list(carrier_type))
+    return calls, lambda overlay, box: overlay.convert_coords_to_rect(*box)
+
+
+def round_away_case():
+    return [(value,) for value in ROUND_VALUES], round_away
+
+
+CASES = {
+    "StarportPads.get_poly_points": poly_points_case,
+    "StarportPads.get_toaster": toaster_case,
+    "StarportPads.get_pad_coords": pad_coords_case,
+    "FleetCarrierPads.calc_values": carrier_values_case,
+    "FleetCarrierPads.get_pad_boxes": carrier_boxes_case,
+    "FleetCarrierPadsOverlay.check_station_box": station_box_case,
+    "FleetCarrierPadsOverlay.convert_coords_to_rect": coords_to_rect_case,
+    "misc.round_away": round_away_case,
+}
+
+
+def plain(value):
+    """tuples as plain JSON lists"""
+    if isinstance(value, (tuple, list)):
+        return [plain(v) for v in value]
+    return value
+
+
+def outputs():
+    result = {}
+    for name, case in CASES.items():
+        calls, func = case()
+        geometry.cache_clear()
+        result[name] = [plain(func(*args)) for args in calls]
+    return result
+
+
+def check(golden):
+    """:return: list of (case, call index) that differ from the golden output"""
+    current = outputs()
+    failed = []
+    for name in CASES:
+        expected = golden.get(name)
+        got = current[name]
+        if expected is None or len(expected) != len(got):
+            failed.append((name, None))
+            continue
+        failed.extend((name, i) for i, (e, g) in enumerate(zip(expected, got)) if e != g)
+    return failed
+
+
+def cache_counts():
+    """:return: hits and misses of all memoised geometry functions"""
+    infos = geometry.cache_info().values()
+    return sum(info.hits for info in infos), sum(info.misses for info in infos)
+
+
+def bench(min_time):
+    result = {}
+    for name, case in CASES.items():
+        calls, func = case()
+        timings = {}
+        for mode in ("cold", "cached"):
+            count = 0
+            elapsed = 0.0
+            geometry.cache_clear()
+            if mode == "cached":
+                # warm up, only the hits are timed
+                for args in calls:
+                    func(*args)
+            hits, misses = cache_counts()
+            while elapsed < min_time:
+                if mode == "cold":
+                    geometry.cache_clear()
+                start = time.perf_counter()
+                for args in calls:
+                    func(*args)
+                elapsed += time.perf_counter() - start
+                count += len(calls)
+            timings[f"{mode}_ops_per_sec"] = round(count / elapsed)
+            if mode == "cached":
+                # below 1.0 the case doesn't fit into geometry.CACHE_SIZE
+                hits, misses = (now - before for now, before in zip(cache_counts(), (hits, misses)))
+                timings["cached_hit_rate"] = round(hits / (hits + misses), 3) if hits + misses else None
+        result[name] = dict(calls=len(calls), **timings)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geometry benchmark and golden output check")
+    parser.add_argument("--check", action="store_true", help="compare with the golden outputs")
+    parser.add_argument("--update", action="store_true", help="write the golden outputs")
+    parser.add_argument("--bench", action="store_true", help="measure ops/sec")
+    parser.add_argument("--golden", default=GOLDEN, help="golden output file")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per case and mode")
+    parser.add_argument("--baseline", help="earlier --bench result to compare with")
+    parser.add_argument("-o", "--output", help="write the --bench result to this file")
+    args = parser.parse_args()
+    if not (args.check or args.update or args.bench):
+        parser.error("one of --check, --update or --bench is required")
+
+    if args.update:
+        with open(args.golden, "w") as golden:
+            json.dump(outputs(), golden, indent=1, sort_keys=True)
+            golden.write("\n")
+        print(f"golden outputs -> {args.golden}")
+
+    if args.check:
+        with open(args.golden) as golden:
+            failed = check(json.load(golden))
+        for name, index in failed:
+            print(f"FAIL {name}" + ("" if index is None else f" call {index}"))
+        if failed:
+            sys.exit(1)
+        print(f"{len(CASES)} cases identical to {args.golden}")
+
+    if args.bench:
+        result = bench(args.min_time)
+        if args.baseline:
+            with open(args.baseline) as baseline:
+                before = json.load(baseline)
+            for name, timings in result.items():
+                if name in before:
+                    for key in ("cold_ops_per_sec", "cached_ops_per_sec"):
+                        timings[key.replace("ops_per_sec", "speedup")] = round(
+                            timings[key] / before[name][key], 2
+                        )
+        text = json.dumps(result, indent=2)
+        if args.output:
+            with open(args.output, "w") as output:
+                output.write(text + "\n")
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+#
+# Replay journal files through the plugin and measure journal_entry
+# end to end: handler time, canvas redraws and the overlay traffic.
+#
+#   bench_journal.py ~/Saved\ Games/Frontier\ Developments/Elite\ Dangerous
+#   bench_journal.py Journal.2025-01-01T120000.01.log -o result.json
+#   bench_journal.py --synthetic 2000
+#
+# EDMC's config, myNotebook and ttkHyperlinkLabel modules are replaced
+# by small stand-ins, the overlay talks to the fake EDMCOverlay server.
+# Tk needs a display, without $DISPLAY an Xvfb server is started.
+# Only the Xvfb binary is needed (e.g. the xvfb package of the
+# distribution), no Python package.
+#
+
+import argparse
+import functools
+import glob
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+# events journal_entry reacts to, next to the hide events of the plugin
+EVENTS = {"DockingGranted", "Music", "SendText"}
+
+
+class Config(object):
+    """dict based stand-in for EDMC's config object"""
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    def get_int(self, key, default=0):
+        try:
+            return int(self.values.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_bool(self, key, default=False):
+        return bool(self.values.get(key, default))
+
+    def get_str(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    getint = get_int
+    get = get_str
+
+
+def install_stubs(settings):
+    """register the EDMC modules load.py imports"""
+    import tkinter as tk
+
+    config = types.ModuleType("config")
+    config.appname = "EDMarketConnector"
+    config.config = Config(settings)
+
+    notebook = types.ModuleType("myNotebook")
+    notebook.Frame = tk.Frame
+    notebook.Label = tk.Label
+    notebook.Checkbutton = tk.Checkbutton
+    notebook.OptionMenu = tk.OptionMenu
+    notebook.EntryMenu = tk.Entry
+
+    class HyperlinkLabel(tk.Label):
+        def __init__(self, master=None, url=None, underline=None, **kw):
+            super().__init__(master, **kw)
+            self.url = url
+
+    hyperlink = types.ModuleType("ttkHyperlinkLabel")
+    hyperlink.HyperlinkLabel = HyperlinkLabel
+
+    sys.modules.update(config=config, myNotebook=notebook, ttkHyperlinkLabel=hyperlink)
+
+
+def load_plugin(plugin_dir):
+    spec = importlib.util.spec_from_file_location("load", os.path.join(plugin_dir, "load.py"))
+    plugin = importlib.util.module_from_spec(spec)
+    sys.modules["load"] = plugin
+    spec.loader.exec_module(plugin)
+    return plugin
+
+
+class VirtualDisplay(object):
+    """start Xvfb if there is no display to use"""
+
+    def __init__(self, size="1920x1080x24"):
+        self.size = size
+        self.process = None
+
+    def __enter__(self):
+        if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+            return self
+        xvfb = shutil.which("Xvfb")
+        if xvfb is None:
+            sys.exit("no $DISPLAY and no Xvfb found, one of them is needed for Tk")
+        number = 99
+        while os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            number += 1
+        self.process = subprocess.Popen(
+            [xvfb, f":{number}", "-screen", "0", self.size, "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            if time.monotonic() > deadline or self.process.poll() is not None:
+                self.__exit__()
+                sys.exit("Xvfb did not start")
+            time.sleep(0.05)
+        os.environ["DISPLAY"] = f":{number}"
+        return self
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+
+def journal_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "Journal.*.log"))))
+        else:
+            files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def read_journals(files, events):
+    """stream the entries of the journal files, None for all events"""
+    for filename in files:
+        with open(filename, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if events is None or entry.get("event") in events:
+                    yield entry
+
+
+def synthetic_journal(count, seed=0):
+    """a reproducible mix of the events the plugin handles"""
+    rnd = random.Random(seed)
+    docking = [
+        lambda: {"StationType": rnd.choice(["Coriolis", "Orbis", "Ocellus", "Bernal", "AsteroidBase"]),
+                 "StationName": "Jameson Memorial", "MarketID": 128666762, "LandingPad": rnd.randint(1, 45)},
+        lambda: {"StationType": "FleetCarrier", "StationName": "K7Q-BQL",
+                 "MarketID": 3700000000, "LandingPad": rnd.randint(1, 16)},
+        lambda: {"StationType": "FleetCarrier", "StationName": "ABCD",
+                 "MarketID": 3700000001, "LandingPad": rnd.randint(1, 32)},
+        lambda: {"StationType": "SurfaceStation", "StationName": "$EXT_PANEL_ColonisationShip; Foo",
+                 "MarketID": 3900000000, "LandingPad": rnd.randint(1, 16)},
+    ]
+    commands = ["!sppad", "!fcpad", "!scpad", "!cspad"]
+    for _ in range(count):
+        roll = rnd.random()
+        if roll < 0.4:
+            entry = dict(event="DockingGranted", **rnd.choice(docking)())
+        elif roll < 0.55:
+            entry = {"event": rnd.choice(["Docked", "DockingCancelled", "DockingTimeout", "StartJump"])}
+        elif roll < 0.65:
+            entry = {"event": "Music", "MusicTrack": rnd.choice(["MainMenu", "Exploration", "Starport"])}
+        else:
+            pad = rnd.choice(["", str(rnd.randint(1, 40))])
+            entry = {"event": "SendText", "To": "local", "Message": rnd.choice(commands) + pad}
+        yield entry
+
+
+def event_key(entry):
+    event = entry.get("event")
+    if event == "SendText":
+        return f"SendText {entry.get('Message', '')[:6]}"
+    if event == "Music":
+        return f"Music {entry.get('MusicTrack')}"
+    return event
+
+
+def percentile(values, p):
+    """nearest rank percentile of sorted values"""
+    if not values:
+        return None
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(samples):
+    result = {"count": len(samples)}
+    if not samples:
+        return result
+    for name in ("handler_ms", "render_ms", "overlay_ms"):
+        values = sorted(sample[name] for sample in samples)
+        result[name] = {
+            "p50": round(percentile(values, 50), 4),
+            "p95": round(percentile(values, 95), 4),
+            "p99": round(percentile(values, 99), 4),
+            "max": round(values[-1], 4),
+        }
+    for name in ("redraws", "overlay_messages", "overlay_bytes"):
+        total = sum(sample[name] for sample in samples)
+        result[name] = {"total": total, "per_event": round(total / len(samples), 3)}
+    return result
+
+
+def traffic(server):
+    """:return: messages and bytes the fake server received so far"""
+    if server is None:
+        return 0, 0
+    return len(server.records), server.bytes
+
+
+def replay(plugin, entries, server, root, timeout):
+    from lpads import render_scheduler
+
+    samples = {}
+    for entry in entries:
+        performed = render_scheduler.performed
+        sent_msgs, sent_bytes = traffic(server)
+        overlay = plugin.this.overlay
+
+        start = time.perf_counter()
+        plugin.journal_entry("Bench", False, "Sol", None, entry, {})
+        handled = time.perf_counter()
+        render_scheduler.flush()
+        root.update_idletasks()
+        rendered = time.perf_counter()
+        overlay = plugin.this.overlay or overlay
+        if overlay is not None and server is not None:
+            overlay.flush(timeout)
+            server.wait_messages(overlay.transport.messages, timeout)
+        drawn = time.perf_counter()
+        msgs, nbytes = traffic(server)
+
+        samples.setdefault(event_key(entry), []).append({
+            "handler_ms": (handled - start) * 1000,
+            "render_ms": (rendered - handled) * 1000,
+            "overlay_ms": (drawn - handled) * 1000,
+            "redraws": render_scheduler.performed - performed,
+            "overlay_messages": msgs - sent_msgs,
+            "overlay_bytes": nbytes - sent_bytes,
+        })
+    return samples
+
+
+def run(args):
+    import tkinter as tk
+    from fake_overlay import FakeOverlayServer
+    from lpads import Overlay
+
+    server = None if args.no_overlay else FakeOverlayServer(port=0).run()
+    install_stubs({
+        "theme": 0,
+        "landingpad_backward": args.backward,
+        "landingpad_use_overlay": server is not None,
+        "landingpad_ms_delay": str(args.ms_delay),
+        "landingpad_scr_overlay": "1920x1080",
+    })
+    root = tk.Tk()
+    root.geometry(f"{args.width}x{args.width + 100}")
+    root.columnconfigure(0, weight=1)
+
+    startup = time.perf_counter()
+    plugin = load_plugin(args.plugin_dir)
+    if server is not None:
+        plugin.Overlay = functools.partial(Overlay, port=server.port)
+    plugin.plugin_start3(args.plugin_dir)
+    frame = plugin.plugin_app(root)
+    frame.grid(sticky=tk.EW)
+    root.update()
+    startup = time.perf_counter() - startup
+
+    if args.synthetic:
+        files = []
+        entries = synthetic_journal(args.synthetic, args.seed)
+    else:
+        files = journal_files(args.journals)
+        entries = read_journals(files, None if args.all_events else EVENTS | plugin.this.hide_events)
+    try:
+        samples = replay(plugin, entries, server, root, args.timeout)
+    finally:
+        plugin.plugin_stop()
+        root.destroy()
+        if server is not None:
+            server.close()
+
+    every = [sample for event in samples.values() for sample in event]
+    return {
+        "plugin_version": plugin.__version__,
+        "python": platform.python_version(),
+        "tk": tk.TkVersion,
+        "journals": files,
+        "synthetic": args.synthetic,
+        "startup_ms": round(startup * 1000, 3),
+        "startup_plugin_ms": round(plugin.this.startup_ms, 3),
+        "startup_budget_ms": plugin.STARTUP_BUDGET,
+        "total": summarize(every),
+        "events": {key: summarize(event) for key, event in sorted(samples.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay journals through journal_entry")
+    parser.add_argument("journals", nargs="*", help="journal files, globs or the journal directory")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="replay N generated events instead")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated events")
+    parser.add_argument("--all-events", action="store_true", help="pass every journal event to the plugin")
+    parser.add_argument("--plugin-dir", default=ROOT)
+    parser.add_argument("--width", type=int, default=300, help="width of the plugin frame")
+    parser.add_argument("--backward", action="store_true")
+    parser.add_argument("--no-overlay", action="store_true", help="canvas only")
+    parser.add_argument("--ms-delay", type=int, default=0, help="drawing delay of the overlay")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for the overlay")
+    parser.add_argument("-o", "--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+    if not args.journals and not args.synthetic:
+        parser.error("journal files or --synthetic are required")
+
+    with VirtualDisplay():
+        result = run(args)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Compare the legacy overlay socket writes with the batched transport
+# against a local sink server.
+#
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lpads.transport import SocketTransport
+
+
+def sink_server():
+    srv = socket.socket()
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+    received = [0]
+
+    def serve():
+        while True:
+            conn, _ = srv.accept()
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                received[0] += data.count(b"\n")
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return srv.getsockname()[1], received
+
+
+def sample_messages(count):
+    msgs = []
+    for i in range(count):
+        msgs.append({
+            "id": f"LandingPad-Starport-shell-{i}",
+            "color": "#ffffff",
+            "shape": "vect",
+            "ttl": 600,
+            "vector": [{"x": 100 + p, "y": 490 - p} for p in range(13)],
+        })
+    return msgs
+
+
+def wait_received(received, count, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while received[0] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def bench_legacy(port, received, msgs):
+    # what Overlay.send_raw did before: two send calls per message
+    conn = socket.socket()
+    conn.connect(("127.0.0.1", port))
+    start_count = received[0]
+    nbytes = 0
+    start = time.perf_counter()
+    for msg in msgs:
+        data = json.dumps(msg).encode()
+        conn.send(data)
+        conn.send(b"\n")
+        nbytes += len(data) + 1
+    wait_received(received, start_count + len(msgs))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, nbytes, 2 * len(msgs)
+
+
+def bench_batched(port, received, msgs, batch):
+    transport = SocketTransport("127.0.0.1", port)
+    transport.connect()
+    start_count = received[0]
+    start = time.perf_counter()
+    for i in range(0, len(msgs), batch):
+        transport.send_frame(msgs[i:i+batch])
+    wait_received(received, start_count + len(msgs))
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return elapsed, transport.bytes, transport.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the overlay socket transport")
+    parser.add_argument("-n", "--count", type=int, default=20000, help="messages per run")
+    parser.add_argument("-b", "--batch", type=int, default=64, help="messages per frame")
+    parser.add_argument("--json", action="store_true", help="machine readable output")
+    args = parser.parse_args()
+
+    port, received = sink_server()
+    msgs = sample_messages(args.count)
+    results = {}
+    for name, run in (
+        ("legacy", lambda: bench_legacy(port, received, msgs)),
+        (f"batched-{args.batch}", lambda: bench_batched(port, received, msgs, args.batch)),
+    ):
+        elapsed, nbytes, syscalls = run()
+        results[name] = {
+            "messages": len(msgs),
+            "seconds": elapsed,
+            "msgs_per_sec": len(msgs) / elapsed,
+            "bytes_per_syscall": nbytes / syscalls,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, res in results.items():
+            print(f"{name:12s} {res['msgs_per_sec']:12.0f} msg/s {res['bytes_per_syscall']:10.1f} bytes/syscall")
+
+if __name__ == "__main__":
+    main()
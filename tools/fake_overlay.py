@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+#
+# Local stand-in for the EDMCOverlay server. It records every message
+# with a timestamp and rebuilds the scene the real overlay would show.
+#
+#   fake_overlay.py serve -o capture.jsonl.gz   run on 127.0.0.1:5010
+#   fake_overlay.py scene capture.jsonl.gz      shapes alive at the end
+#   fake_overlay.py measure                     draw the station layouts
+#
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lpads import CarrierType, FleetCarrierPadsOverlay, Overlay, StarportPadsOverlay
+from lpads.overlay import SERVER_ADDRESS, SERVER_PORT
+
+
+class Scene(object):
+    """
+    Shapes the overlay shows, rebuilt from the received messages
+    """
+
+    def __init__(self):
+        self.shapes = {}        # id -> (expiry time or None, message)
+
+    def apply(self, t, msg):
+        gfx_id = msg.get("id")
+        ttl = msg.get("ttl")
+        if ttl == 0:
+            self.shapes.pop(gfx_id, None)
+        else:
+            self.shapes[gfx_id] = (None if ttl is None else t + ttl, msg)
+
+    def live(self, at=None):
+        """
+        :param at: time of the capture, None for no expiry
+        :return: dict of id -> message of the shapes alive at that time
+        """
+        return {
+            gfx_id: msg
+            for gfx_id, (expires, msg) in self.shapes.items()
+            if at is None or expires is None or expires > at
+        }
+
+
+class FakeOverlayServer(object):
+    """
+    Newline delimited JSON server which records all messages,
+    times are seconds since the server was started
+    """
+
+    def __init__(self, host=SERVER_ADDRESS, port=SERVER_PORT):
+        self.srv = socket.socket()
+        self.srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.srv.bind((host, port))
+        self.srv.listen()
+        self.port = self.srv.getsockname()[1]
+        self.start = time.monotonic()
+        self.records = []       # (time, connection, message)
+        self.scene = Scene()
+        self.bytes = 0
+        self.errors = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.received = threading.Condition(self.lock)
+        self.closed = False
+        self.clients = set()    # open client connections
+        self.thread = None
+
+    def now(self):
+        return time.monotonic() - self.start
+
+    def serve_forever(self):
+        while True:
+            try:
+                conn, _ = self.srv.accept()
+            except OSError:
+                return
+            with self.lock:
+                if self.closed:
+                    conn.close()
+                    return
+                self.clients.add(conn)
+            self.connections += 1
+            threading.Thread(target=self.handle, args=(conn, self.connections), daemon=True).start()
+
+    def run(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        """stop listening and drop the clients, like a dying overlay"""
+        with self.lock:
+            self.closed = True
+            clients = list(self.clients)
+        # close() alone doesn't wake a blocked accept() on Linux
+        for sock in [self.srv] + clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def handle(self, conn, number):
+        buffer = b""
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(65536)
+                except OSError:
+                    break
+                if not data:
+                    break
+                t = self.now()
+                lines = (buffer + data).split(b"\n")
+                buffer = lines.pop()
+                with self.received:
+                    self.bytes += len(data)
+                    for line in lines:
+                        try:
+                            msg = json.loads(line)
+                        except ValueError:
+                            self.errors += 1
+                            continue
+                        self.records.append((t, number, msg))
+                        self.scene.apply(t, msg)
+                    self.received.notify_all()
+        with self.lock:
+            self.clients.discard(conn)
+
+    def wait_messages(self, count, timeout=10.0):
+        """wait until count messages are recorded"""
+        with self.received:
+            return self.received.wait_for(lambda: len(self.records) >= count, timeout)
+
+    def live(self, expire=True):
+        with self.lock:
+            return self.scene.live(self.now() if expire else None)
+
+    def save(self, filename):
+        """write the capture as JSON lines, gzip compressed for a .gz name"""
+        opener = gzip.open if filename.endswith(".gz") else open
+        with opener(filename, "wt") as capture, self.lock:
+            for t, number, msg in self.records:
+                capture.write(json.dumps([round(t, 6), number, msg], separators=(",", ":")) + "\n")
+
+
+def load_capture(filename):
+    """:return: list of (time, connection, message)"""
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, "rt") as capture:
+        return [tuple(json.loads(line)) for line in capture if line.strip()]
+
+
+def scene_of(records, at=None):
+    scene = Scene()
+    for t, _, msg in records:
+        scene.apply(t, msg)
+    return scene.live(at)
+
+
+def measure_station(make_overlay):
+    server = FakeOverlayServer(port=0).run()
+    overlay = Overlay(logging.getLogger("fake_overlay"), port=server.port, refresh_margin=0)
+    overlay.start()
+    overlay.flush(10)
+    station = make_overlay(overlay)
+    result = {}
+    for step, action in (("show", station.show_overlay), ("hide", station.hide_overlay)):
+        count = len(server.records)
+        nbytes = server.bytes
+        start = server.now()
+        action()
+        overlay.flush(10)
+        server.wait_messages(overlay.transport.messages)
+        records = server.records[count:]
+        live = server.live(expire=False)
+        result[step] = {
+            "messages": len(records),
+            "bytes": server.bytes - nbytes,
+            "latency_ms": round(((records[-1][0] if records else start) - start) * 1000, 3),
+            "live": len(live),
+            "scene_ok": sorted(live) == sorted(station.registry.ids()),
+        }
+    overlay.stop()
+    server.close()
+    return result
+
+
+def measure(args):
+    settings = (
+        args.radius, args.center_x, args.center_y, args.screen_w, args.screen_h,
+        args.delay, "#ffffff", "yellow", 600, args.pad, None,
+    )
+    stations = [("Starport", lambda overlay: StarportPadsOverlay(overlay, False, *settings))]
+    for carrier_type in CarrierType:
+        stations.append((
+            carrier_type.name,
+            lambda overlay, carrier_type=carrier_type: FleetCarrierPadsOverlay(
+                overlay, False, *settings, carrier_type=carrier_type,
+            ),
+        ))
+    return {name: measure_station(make_overlay) for name, make_overlay in stations}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake EDMCOverlay server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="record the traffic until interrupted")
+    serve.add_argument("--host", default=SERVER_ADDRESS)
+    serve.add_argument("--port", type=int, default=SERVER_PORT)
+    serve.add_argument("-o", "--output", default="overlay-capture.jsonl.gz", help="capture file")
+
+    scene = commands.add_parser("scene", help="print the scene of a capture")
+    scene.add_argument("capture")
+    scene.add_argument("--at", type=float, help="seconds into the capture, default is the end")
+
+    bench = commands.add_parser("measure", help="draw all station layouts against a fake server")
+    bench.add_argument("--radius", type=int, default=100)
+    bench.add_argument("--center-x", type=int, default=100)
+    bench.add_argument("--center-y", type=int, default=490)
+    bench.add_argument("--screen-w", type=int, default=1920)
+    bench.add_argument("--screen-h", type=int, default=1080)
+    bench.add_argument("--pad", type=int, default=7)
+    bench.add_argument("--delay", type=int, default=0, help="ms delay of the overlay")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        server = FakeOverlayServer(args.host, args.port)
+        print(f"listening on {args.host}:{server.port}, Ctrl-C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.save(args.output)
+        print(f"{len(server.records)} messages, {server.bytes} bytes -> {args.output}")
+    elif args.command == "scene":
+        records = load_capture(args.capture)
+        at = args.at if args.at is not None else (records[-1][0] if records else 0)
+        print(json.dumps(scene_of(records, at), indent=2))
+    else:
+        print(json.dumps(measure(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
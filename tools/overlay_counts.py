@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Count the overlay messages and bytes of a station drawing,
+# without and with the compaction of the primitives.
+#
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lpads import CarrierType, FleetCarrierPadsOverlay, StarportPadsOverlay
+from lpads.transport import encode
+
+
+def overlays(args):
+    settings = (
+        None, False, args.radius, args.center_x, args.center_y, args.screen_w, args.screen_h,
+        0, "#ffffff", "yellow", 600, args.pad, None,
+    )
+    yield "Starport", StarportPadsOverlay(*settings)
+    for carrier_type in CarrierType:
+        yield carrier_type.name, FleetCarrierPadsOverlay(*settings, carrier_type=carrier_type)
+
+
+def count(overlay, compact):
+    overlay.compact = compact
+    result = {}
+    for name in overlay.layer_names:
+        shapes = overlay.build_layer(name)
+        result[name] = {
+            "messages": len(shapes),
+            "bytes": sum(len(encode(msg)) for msg in shapes.values()),
+        }
+    result["total"] = {
+        "messages": sum(layer["messages"] for layer in result.values()),
+        "bytes": sum(layer["bytes"] for layer in result.values()),
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overlay message counts before and after compaction")
+    parser.add_argument("--radius", type=int, default=100)
+    parser.add_argument("--center-x", type=int, default=100)
+    parser.add_argument("--center-y", type=int, default=490)
+    parser.add_argument("--screen-w", type=int, default=1920)
+    parser.add_argument("--screen-h", type=int, default=1080)
+    parser.add_argument("--pad", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="machine readable output")
+    args = parser.parse_args()
+
+    results = {}
+    for station, overlay in overlays(args):
+        results[station] = {
+            "before": count(overlay, False),
+            "after": count(overlay, True),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for station, result in results.items():
+        print(station)
+        for name in result["before"]:
+            before, after = result["before"][name], result["after"][name]
+            print(
+                f"  {name:8} {before['messages']:4} -> {after['messages']:4} messages"
+                f"  {before['bytes']:6} -> {after['bytes']:6} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
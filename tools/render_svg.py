@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Render the station display lists into SVG files without Tk,
+# and time how long building the display lists takes.
+#
+#   render_svg.py -o out/            write one SVG per station and pad
+#   render_svg.py --bench 2000       time the display list builds
+#
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lpads import CarrierType, display, geometry
+
+
+def scenes(size, backward, pad):
+    """:return: list of (name, display list), laid out like the canvas of size x size"""
+    center = int(size/2 + 0.5)
+    strong = 4 - (center < 250) - (center < 150) - (center < 50)
+    radius = center - strong
+    strong = 4 - (radius < 250) - (radius < 150) - (radius < 50)
+    result = [(
+        "starport",
+        display.starport_station(center, center, radius, strong, "black", backward)
+        + (display.starport_pad(pad, center, center, radius, backward, "blue"),)
+    )]
+    for carrier_type in CarrierType:
+        box_w, box_h = geometry.carrier_units(carrier_type)
+        unit = max((size - 4) / max(box_w, box_h), 1)
+        strong = 4 - (unit < 16) - (unit < 9) - (unit < 4)
+        if backward:
+            unit = -unit
+        result.append((
+            carrier_type.name.lower(),
+            display.carrier_station(carrier_type, unit, size/2, size/2, strong, "black")
+            + (display.carrier_pad(pad, carrier_type, unit, size/2, size/2, strong, "black", "blue"),)
+        ))
+    return result
+
+
+def clear_caches():
+    geometry.cache_clear()
+    for func in display.CACHED_FUNCTIONS:
+        func.cache_clear()
+
+
+def bench(args):
+    result = {}
+    for name, clear in (("cold", True), ("cached", False)):
+        clear_caches()
+        start = time.perf_counter()
+        for _ in range(args.bench):
+            if clear:
+                clear_caches()
+            scenes(args.size, args.backward, args.pad)
+        elapsed = time.perf_counter() - start
+        result[name] = {
+            "scenes": args.bench,
+            "us_per_scene": round(elapsed / args.bench * 1e6, 2),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the station display lists as SVG")
+    parser.add_argument("--size", type=int, default=300, help="canvas size in pixel")
+    parser.add_argument("--pad", type=int, default=7)
+    parser.add_argument("--backward", action="store_true")
+    parser.add_argument("-o", "--output", default=".", help="output directory")
+    parser.add_argument("--bench", type=int, metavar="N", help="time N display list builds instead")
+    args = parser.parse_args()
+
+    if args.bench:
+        print(json.dumps(bench(args), indent=2))
+        return
+    os.makedirs(args.output, exist_ok=True)
+    for name, primitives in scenes(args.size, args.backward, args.pad):
+        filename = os.path.join(args.output, f"{name}-{args.size}.svg")
+        with open(filename, "w") as svg:
+            svg.write(display.svg(primitives, args.size, args.size, background="white"))
+        print(f"{len(primitives):4} primitives -> {filename}")
+
+
+if __name__ == "__main__":
+    main()